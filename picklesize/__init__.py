@@ -1,5 +1,20 @@
-from _picklesize import PickleSize, picklesize, PlaceHolder
+from _core import SizeBounds
+from _picklesize import PickleSize, picklesize, picklesizebounds, PlaceHolder
 from _fastpicklesize import fastpicklesize, FastPickleSize
+from _marshalsize import MarshalSize, marshalsize
+from _jsonsize import JsonSize, jsonsize
+from _msgpacksize import MsgpackSize, msgpacksize
+from _formats import formatsizes
+from _cost import PickleCost, PickleCounts, picklecost, CostModel, calibrate
+from _dedup import DedupAnalysis, DedupReport, DuplicateValue, dedupanalysis
+from _chunking import sizedchunks, ChunkFunction, chunkedmap, benchmarkchunks
 import _numpysupport
+import _stdlibsupport
 
-__all__ = ['PickleSize', 'picklesize', 'fastpicklesize', 'FastPickleSize']
+__all__ = ['PickleSize', 'picklesize', 'picklesizebounds', 'PlaceHolder',
+           'SizeBounds', 'fastpicklesize', 'FastPickleSize',
+           'MarshalSize', 'marshalsize', 'JsonSize', 'jsonsize',
+           'MsgpackSize', 'msgpacksize', 'formatsizes',
+           'PickleCost', 'PickleCounts', 'picklecost', 'CostModel', 'calibrate',
+           'DedupAnalysis', 'DedupReport', 'DuplicateValue', 'dedupanalysis',
+           'sizedchunks', 'ChunkFunction', 'chunkedmap', 'benchmarkchunks']
@@ -0,0 +1,101 @@
+import hashlib
+import itertools
+import multiprocessing
+import pickle
+import random
+
+from _fastpicklesize import FastPickleSize
+from _cost import _best_time
+
+
+def sizedchunks(iterable, chunk_bytes, protocol=pickle.HIGHEST_PROTOCOL,
+                estimator=None, max_items=None):
+    """
+    Groups the items of `iterable` into lists of about `chunk_bytes`
+    pickled bytes each.
+
+    Each item is sized once, when it is taken from `iterable`, with
+    `estimator` which defaults to a `FastPickleSize`. A chunk is passed on
+    before adding the next item would exceed `chunk_bytes` or the chunk
+    has `max_items` items. Items larger than `chunk_bytes` get a chunk of
+    their own.
+    """
+    if estimator is None:
+        estimator = FastPickleSize()
+
+    chunk = []
+    chunk_size = 0
+    for item in iterable:
+        size = estimator.picklesize(item, protocol)
+        if chunk and (chunk_size + size > chunk_bytes or len(chunk) == max_items):
+            yield chunk
+            chunk = []
+            chunk_size = 0
+        chunk.append(item)
+        chunk_size += size
+    if chunk:
+        yield chunk
+
+
+class ChunkFunction(object):
+    """
+    Calls `function` for each item of a chunk and returns the list of
+    the results. Can be pickled if `function` can, so that it can be passed
+    to `Pool.imap` or `Executor.map` together with the chunks.
+    """
+    def __init__(self, function):
+        self.function = function
+
+    def __call__(self, chunk):
+        return [self.function(item) for item in chunk]
+
+
+def chunkedmap(map_function, function, iterable, chunk_bytes,
+               protocol=pickle.HIGHEST_PROTOCOL, estimator=None, max_items=None):
+    """
+    Maps `function` over `iterable` with `map_function`, such as
+    `pool.imap` or `executor.map`, in chunks of `sizedchunks`. Returns an
+    iterator over the results of the individual items.
+    """
+    chunks = sizedchunks(iterable, chunk_bytes, protocol, estimator, max_items)
+    results = map_function(ChunkFunction(function), chunks)
+    return itertools.chain.from_iterable(results)
+
+
+def _work(item):
+    # Takes time proportional to the size of the argument.
+    return hashlib.md5(item).digest()
+
+
+def _workload(n):
+    # Strings of 16 bytes to 1 MiB, as many of each order of magnitude.
+    rnd = random.Random(0)
+    for _ in xrange(n):
+        yield int(2**rnd.uniform(4, 20)) * "x"
+
+
+def benchmarkchunks(n=5000, chunk_bytes=256*1024, chunksizes=(1, 16, 256),
+                    processes=None, repeat=3):
+    """
+    Times `Pool.imap` on `n` string arguments of mixed sizes, once for
+    each fixed `chunksize` and once with chunks of `chunk_bytes` pickled
+    bytes.
+
+    Returns a list of `(name, seconds, items per second)`.
+    """
+    pool = multiprocessing.Pool(processes)
+    try:
+        fixed = lambda chunksize: list(pool.imap(_work, _workload(n), chunksize))
+        sized = lambda budget: list(chunkedmap(pool.imap, _work, _workload(n), budget))
+
+        runs = [("chunksize=%s" % chunksize, fixed, chunksize) for chunksize in chunksizes]
+        runs.append(("chunk_bytes=%s" % chunk_bytes, sized, chunk_bytes))
+
+        results = []
+        for name, func, arg in runs:
+            seconds = _best_time(func, arg, repeat)
+            results.append((name, seconds, n / seconds))
+        return results
+    finally:
+        pool.terminate()
+        pool.join()
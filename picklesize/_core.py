@@ -0,0 +1,70 @@
+import collections
+
+
+class SizeBounds(collections.namedtuple("SizeBounds", ["low", "high"])):
+    """
+    A size that is only known to be between `low` and `high`.
+    """
+    __slots__ = ()
+
+class SizeEstimator(object):
+    """
+    Format independent part of the estimators.
+
+    Walks the object tree and dispatches each object to a handler looked up
+    by its exact type in `_handlers`. A handler is called as
+    `handler(self, obj, obj_type, obj_id)` and returns the number of bytes
+    the object would occupy in the serialized output. Objects without a
+    handler are passed to `_Generic`, which by default sizes instances of
+    subclasses like their closest base class in `_handlers`.
+
+    Subclasses register their handlers in their own `_handlers` dict.
+    Serializers that accept other objects override `_Generic`, those that
+    memorize objects override `_traverse` to check their memo before
+    dispatching.
+    """
+
+    _handlers = {}
+
+    def _traverse(self, obj):
+        return self._dispatch(obj, type(obj), id(obj))
+
+    def _dispatch(self, obj, obj_type, obj_id):
+        handler = self._handlers.get(obj_type, None)
+        if handler is not None:
+            return handler(self, obj, obj_type, obj_id)
+        return self._Generic(obj, obj_type, obj_id)
+
+    def _lazy_size(self, obj_id, size, *args):
+        """
+        Returns the size of an object that provides it itself. `size` is
+        a number, a `SizeBounds` or a callable returning either, which is
+        called with `args` at most once per estimate. Bounds count with
+        their upper bound, the difference to the lower bound is added to
+        `_slack`. Estimators reset `_lazy_sizes` and `_slack` for each
+        estimate.
+        """
+        if callable(size):
+            provided = self._lazy_sizes.get(obj_id)
+            if provided is None:
+                provided = self._lazy_sizes[obj_id] = size(*args)
+            size = provided
+        if isinstance(size, tuple):
+            low, high = size
+            self._slack += high - low
+            return high
+        return size
+
+    def _Generic(self, obj, obj_type, obj_id):
+        for base in getattr(obj_type, "__mro__", ()):
+            handler = self._handlers.get(base, None)
+            if handler is not None:
+                return handler(self, obj, obj_type, obj_id)
+        raise self._unsupported(obj)
+
+    def _unsupported(self, obj):
+        """
+        Returns the exception to raise for objects the serializer cannot
+        write.
+        """
+        return TypeError("Cannot serialize %r" % (obj, ))
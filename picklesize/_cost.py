@@ -0,0 +1,284 @@
+import collections
+import pickle
+import timeit
+import types
+
+from _picklesize import PickleSize, PlaceHolder, _DataString
+
+
+class PickleCounts(collections.namedtuple("PickleCounts",
+        ["size", "opcodes", "memo_puts", "memo_gets", "reduces", "bulk_bytes"])):
+    """
+    Operations pickle performs to serialize an object.
+
+    `opcodes` counts the opcodes written except the PUT and GET operations,
+    which `memo_puts` and `memo_gets` count, `reduces` the
+    objects written with a reduce call and `bulk_bytes` the payload of
+    strings and placeholders that is copied to the output in one piece,
+    without the opcodes, lengths and PUTs around it.
+    """
+    __slots__ = ()
+
+class PickleCost(PickleSize):
+    """
+    Like `PickleSize` but also counts the operations pickle performs,
+    which are the inputs of the `CostModel`.
+    """
+
+    # Types whose pickled size is mostly payload that is copied in one piece.
+    _bulk_types = frozenset([str, unicode, PlaceHolder, _DataString])
+
+    def picklesize(self, obj, protocol=0):
+        self._opcodes = 0
+        self._memo_puts = 0
+        self._memo_gets = 0
+        self._reduces = 0
+        self._bulk_bytes = 0
+        # Of the object that is written: the number and the size of the
+        # objects it traverses and the bytes of its PUTs and GETs.
+        self._children = 0
+        self._children_size = 0
+        self._memo_size = 0
+        size = PickleSize.picklesize(self, obj, protocol)
+        # PROTO and STOP
+        self._opcodes += 2 if self._protocol >= 2 else 1
+        return size
+
+    def picklecost(self, obj, protocol=0):
+        size = self.picklesize(obj, protocol)
+
+        return PickleCounts(size, self._opcodes, self._memo_puts,
+                            self._memo_gets, self._reduces, self._bulk_bytes)
+
+    def _traverse(self, obj):
+        memo_size = self._memo_size
+        size = PickleSize._traverse(self, obj)
+        # A GET for `obj` belongs to its size, not to the memo operations
+        # of the object that traverses it.
+        self._memo_size = memo_size
+        self._children += 1
+        self._children_size += size
+        return size
+
+    def _dispatch(self, obj, obj_type, obj_id):
+        outer = self._children, self._children_size, self._memo_size
+        self._children = self._children_size = self._memo_size = 0
+        size = PickleSize._dispatch(self, obj, obj_type, obj_id)
+        self._opcodes += self._count_opcodes(obj, obj_type,
+                                             size - self._children_size - self._memo_size)
+        if obj_type in self._bulk_types:
+            self._bulk_bytes += self._payload_size(obj, obj_type, size)
+        self._children, self._children_size, self._memo_size = outer
+        return size
+
+    def _count_opcodes(self, obj, obj_type, own_size):
+        """
+        Returns the number of opcodes an object writes itself, `own_size`
+        bytes without the objects it traverses and its memo operations.
+        """
+        counter = self._opcode_counters.get(obj_type)
+        if counter is not None:
+            return counter(self, obj, own_size)
+        if not self._children:
+            # A single opcode with its argument, such as an int or GLOBAL.
+            return 1
+        # MARK, REDUCE, BUILD, APPENDS and so on, one byte each.
+        return own_size
+
+    def _InstanceOpcodes(self, obj, own_size):
+        if not self._children:
+            # With `__picklesize__`
+            return 1
+        if not self._bin:
+            # INST has the module and the name of the class as argument.
+            cls = obj.__class__
+            own_size -= 2 + len(cls.__module__) + len(cls.__name__)
+        return own_size
+
+    # Type -> function returning the opcodes where `_count_opcodes` can't
+    # tell them from the size, called with `(self, obj, own_size)`.
+    _opcode_counters = {
+        # Also the empty ones write opcodes without arguments only.
+        list:lambda self, obj, own_size:own_size,
+        tuple:lambda self, obj, own_size:own_size,
+        dict:lambda self, obj, own_size:own_size,
+        types.InstanceType:_InstanceOpcodes,
+    }
+
+    def _payload_size(self, obj, obj_type, size):
+        """
+        Returns the bytes of `size` that are payload, for objects of the
+        `_bulk_types` which write no other objects.
+        """
+        if obj_type is PlaceHolder:
+            return size
+        size -= self._memo_size
+        if not self._bin:
+            # The opcode and the newline
+            return size - 2
+        if obj_type is unicode:
+            # BINUNICODE and the length
+            return size - 5
+        if obj_type is _DataString:
+            return obj.n
+        return len(obj)
+
+    def _memorize(self, obj, obj_id):
+        size = PickleSize._memorize(self, obj, obj_id)
+        if size:
+            self._memo_puts += 1
+        self._memo_size += size
+        return size
+
+    def _get_memory_ref(self, obj_id):
+        ref = PickleSize._get_memory_ref(self, obj_id)
+        if ref is not None:
+            self._memo_gets += 1
+            self._memo_size += self._encode_int(ref)
+        return ref
+
+    def save_reduce(self, *args, **kwargs):
+        self._reduces += 1
+        return PickleSize.save_reduce(self, *args, **kwargs)
+
+
+def picklecost(obj, protocol=0):
+    return PickleCost().picklecost(obj, protocol)
+
+
+class CostModel(object):
+    """
+    Predicts the time `dumps` and `loads` take for an object from its
+    `PickleCounts`.
+
+    The time is modeled as a linear function with one coefficient per
+    count (`size` excluded) plus a constant. Use `calibrate` to fit the
+    coefficients on the current machine. The counts are those of the
+    `target` pickler, `"pickle"` or `"cPickle"`.
+    """
+
+    def __init__(self, dumps_coefficients, loads_coefficients, protocol=pickle.HIGHEST_PROTOCOL,
+                 target="pickle"):
+        self.dumps_coefficients = tuple(dumps_coefficients)
+        self.loads_coefficients = tuple(loads_coefficients)
+        self.protocol = protocol
+        self.target = target
+
+    def predict(self, obj):
+        """
+        Returns a tuple `(size, dumps_seconds, loads_seconds)`.
+        """
+        counts = PickleCost(target=self.target).picklecost(obj, self.protocol)
+        return (counts.size,) + self.predict_counts(counts)
+
+    def predict_counts(self, counts):
+        """
+        Returns a tuple `(dumps_seconds, loads_seconds)` for the given
+        `PickleCounts`.
+        """
+        features = _features(counts)
+        dumps = sum(c*f for c, f in zip(self.dumps_coefficients, features))
+        loads = sum(c*f for c, f in zip(self.loads_coefficients, features))
+        return max(dumps, 0.0), max(loads, 0.0)
+
+    def __repr__(self):
+        return "CostModel(%r, %r, protocol=%r, target=%r)" % (self.dumps_coefficients,
+                                                              self.loads_coefficients,
+                                                              self.protocol, self.target)
+
+
+def _features(counts):
+    return (1,) + tuple(counts[1:])
+
+
+class _Reduced(object):
+    def __init__(self, value):
+        self.value = value
+
+
+def _workloads(scale):
+    n = 1000*scale
+    yield None
+    yield range(n)
+    yield range(10*n)
+    yield [str(i) for i in range(n)]
+    yield [str(i) for i in range(10*n)]
+    x = "shared"
+    yield n*[x]
+    yield 10*n*[x]
+    yield [_Reduced(None) for _ in range(n)]
+    yield [_Reduced(None) for _ in range(5*n)]
+    yield 100*n*"x"
+    yield 1000*n*"x"
+
+
+def _best_time(func, arg, repeat):
+    best = None
+    for _ in range(repeat):
+        start = timeit.default_timer()
+        func(arg)
+        t = timeit.default_timer() - start
+        if best is None or t < best:
+            best = t
+    return best
+
+
+def _least_squares(rows, targets):
+    """
+    Solves the linear least squares problem with the normal equations.
+    Columns are scaled first since the counts differ by orders of magnitude.
+    """
+    k = len(rows[0])
+    scales = [max(abs(row[j]) for row in rows) or 1.0 for j in range(k)]
+    rows = [[float(v)/s for v, s in zip(row, scales)] for row in rows]
+
+    a = [[sum(row[i]*row[j] for row in rows) for j in range(k)] for i in range(k)]
+    b = [sum(row[i]*t for row, t in zip(rows, targets)) for i in range(k)]
+
+    # Gaussian elimination with partial pivoting.
+    for col in range(k):
+        pivot = max(range(col, k), key=lambda r: abs(a[r][col]))
+        a[col], a[pivot] = a[pivot], a[col]
+        b[col], b[pivot] = b[pivot], b[col]
+        if a[col][col] == 0:
+            continue
+        for r in range(col + 1, k):
+            f = a[r][col] / a[col][col]
+            for c in range(col, k):
+                a[r][c] -= f*a[col][c]
+            b[r] -= f*b[col]
+
+    x = [0.0]*k
+    for col in reversed(range(k)):
+        if a[col][col] == 0:
+            continue
+        s = b[col] - sum(a[col][c]*x[c] for c in range(col + 1, k))
+        x[col] = s / a[col][col]
+
+    return [v/s for v, s in zip(x, scales)]
+
+
+def calibrate(module=pickle, protocol=pickle.HIGHEST_PROTOCOL, repeat=3, scale=1):
+    """
+    Fits a `CostModel` for `module.dumps` and `module.loads` by timing them
+    on synthetic workloads on this machine.
+
+    `module` can be any module with the `pickle` interface, such as
+    `cPickle`, whose memo is counted as `cPickle` writes it. `scale`
+    increases the size of the workloads for more accurate timings.
+    """
+    target = "cPickle" if getattr(module, "__name__", None) == "cPickle" else "pickle"
+    estimator = PickleCost(target=target)
+    rows = []
+    dumps_times = []
+    loads_times = []
+    for obj in _workloads(scale):
+        counts = estimator.picklecost(obj, protocol)
+        data = module.dumps(obj, protocol)
+        rows.append(_features(counts))
+        dumps_times.append(_best_time(lambda o: module.dumps(o, protocol), obj, repeat))
+        loads_times.append(_best_time(module.loads, data, repeat))
+
+    return CostModel(_least_squares(rows, dumps_times),
+                     _least_squares(rows, loads_times),
+                     protocol, target)
@@ -0,0 +1,168 @@
+import collections
+import types
+
+from _picklesize import PickleSize
+
+
+class DuplicateValue(collections.namedtuple("DuplicateValue",
+        ["value", "copies", "saving", "locations"])):
+    """
+    A value that is pickled `copies` times since the copies are equal but
+    not identical. `saving` is the number of bytes interning them would
+    save. `locations` maps the locations of the copies to the bytes
+    saved there.
+    """
+    __slots__ = ()
+
+
+class DedupReport(collections.namedtuple("DedupReport",
+        ["size", "saving", "values", "locations"])):
+    """
+    Result of `dedupanalysis`. `size` is the pickled size, `saving` the
+    total number of bytes interning would save. `values` is a list of
+    `DuplicateValue` and `locations` a list of `(location, saving)`
+    tuples, both sorted by the saving, largest first.
+    """
+    __slots__ = ()
+
+
+_SCALAR_TYPES = frozenset([types.NoneType, types.BooleanType, types.IntType,
+                           types.LongType, types.FloatType, types.ComplexType])
+
+_SEQUENCE_TYPES = frozenset([types.ListType, types.TupleType, set, frozenset])
+
+
+def _fingerprint_string(analysis, obj):
+    return type(obj), obj
+
+
+def _fingerprint_tuple(analysis, obj):
+    # Only tuples of scalars, otherwise we would count the savings of
+    # the elements twice. Equal numbers of different type such as
+    # `1` and `1.0` pickle differently.
+    element_types = tuple(type(e) for e in obj)
+    for t in element_types:
+        if t not in _SCALAR_TYPES:
+            return None
+    return types.TupleType, element_types, obj
+
+
+class DedupAnalysis(PickleSize):
+    """
+    Finds values that are equal but not identical, which pickle writes
+    in full each time because its memo works by `id`.
+
+    Strings, unicode strings and tuples of scalars are compared by value.
+    With numpy, arrays of at most `array_threshold` bytes are compared
+    by a hash of their content.
+
+    Locations are written like python expressions with `obj` being the
+    analyzed object. Indices are replaced by `*` so that the elements of
+    a list share a location. Within an object that pickle reduces, the
+    location starts again with the name of its class, such as
+    `Record['name']` for the attribute `name` of `Record` instances.
+    """
+
+    _fingerprinters = {
+        types.StringType:_fingerprint_string,
+        types.UnicodeType:_fingerprint_string,
+        types.TupleType:_fingerprint_tuple,
+    }
+
+    def __init__(self, array_threshold=4096, hybrid=False, fallback_types=(), target="pickle"):
+        PickleSize.__init__(self, hybrid, fallback_types, target)
+        self.array_threshold = array_threshold
+
+    def picklesize(self, obj, protocol=0):
+        return self._analyse(obj, protocol)[0]
+
+    def _analyse(self, obj, protocol):
+        """
+        Returns the size and the values found by their fingerprint.
+        """
+        # fingerprint -> [value, memo ref, copies, saving, {location:saving}]
+        self._values = {}
+        # [object, location, next child is a dict value, key of the value]
+        self._frames = [[None, "obj", False, None]]
+        try:
+            return PickleSize.picklesize(self, obj, protocol), self._values
+        finally:
+            self._values = None
+            self._frames = None
+
+    def dedupanalysis(self, obj, protocol=0):
+        size, found = self._analyse(obj, protocol)
+
+        values = []
+        locations = collections.defaultdict(int)
+        for value, ref, copies, saving, value_locations in found.itervalues():
+            if copies < 2:
+                continue
+            values.append(DuplicateValue(value, copies, saving, dict(value_locations)))
+            for location, s in value_locations.iteritems():
+                locations[location] += s
+
+        values.sort(key=lambda v: v.saving, reverse=True)
+        locations = sorted(locations.iteritems(), key=lambda l: l[1], reverse=True)
+        return DedupReport(size, sum(v.saving for v in values), values, locations)
+
+    def _child_location(self, obj):
+        frame = self._frames[-1]
+        parent, location = frame[0], frame[1]
+        if parent is None:
+            return location
+
+        parent_type = type(parent)
+        if parent_type in _SEQUENCE_TYPES:
+            return location + "[*]"
+        elif parent_type is types.DictType:
+            if frame[2]:
+                frame[2] = False
+                return location + frame[3]
+            frame[2] = True
+            if type(obj) in (types.StringType, types.UnicodeType) and len(obj) <= 32:
+                frame[3] = "[%r]" % obj
+            else:
+                frame[3] = "[*]"
+            return location + ".keys()"
+        else:
+            return getattr(parent, "__class__", parent_type).__name__
+
+    def _traverse(self, obj):
+        location = self._child_location(obj)
+        self._frames.append([obj, location, False, None])
+        try:
+            return PickleSize._traverse(self, obj)
+        finally:
+            self._frames.pop()
+
+    def _dispatch(self, obj, obj_type, obj_id):
+        size = PickleSize._dispatch(self, obj, obj_type, obj_id)
+
+        fingerprinter = self._fingerprinters.get(obj_type, None)
+        if fingerprinter is None:
+            return size
+        fingerprint = fingerprinter(self, obj)
+        if fingerprint is None:
+            return size
+
+        ref = self._get_memory_ref(obj_id)
+        if ref is None:
+            # Not memorized, such as the empty tuple.
+            return size
+
+        value = self._values.get(fingerprint, None)
+        if value is None:
+            self._values[fingerprint] = [obj, ref, 1, 0, collections.defaultdict(int)]
+        else:
+            # Instead of the copy, pickle could write a GET of the first
+            # instance.
+            saving = size - self._encode_int(value[1])
+            value[2] += 1
+            value[3] += saving
+            value[4][self._frames[-1][1]] += saving
+        return size
+
+
+def dedupanalysis(obj, protocol=0, array_threshold=4096):
+    return DedupAnalysis(array_threshold).dedupanalysis(obj, protocol)
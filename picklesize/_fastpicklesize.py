@@ -3,21 +3,10 @@ import pickle
 import sys
 import copy_reg
 
-class PlaceHolder(object):
-    """
-    Instances of this class cause the estimate to increase by a set amount
-    instead of the space it would actually require to store the instance.
-    This can be used to correctly estimate the pickle size of large objects
-    without actually constructing the object if there is some alternative
-    way of estimating the size of it.
-    """
-    def __init__(self, size):
-        self.size = size
-        
-    def __repr__(self):
-        return "PlaceHolder(%r)" % self.size
+from _core import SizeEstimator, SizeBounds
+from _picklesize import PlaceHolder
 
-class FastPickleSize(object):
+class FastPickleSize(SizeEstimator):
     
     def picklesize(self, obj, protocol=0):
         
@@ -28,8 +17,14 @@ class FastPickleSize(object):
         self._protocol = protocol
         
         self._seen = set()
+        self._lazy_sizes = {}
+        self._slack = 0
         
         return 3 + self._traverse(obj)
+
+    def picklesizebounds(self, obj, protocol=0):
+        high = self.picklesize(obj, protocol)
+        return SizeBounds(high - self._slack, high)
     
     
     def _traverse(self, obj):
@@ -80,6 +75,8 @@ class FastPickleSize(object):
         #return sum(self._traverse(k) + self._traverse(v) for k, v in obj.iteritems())
             
     def _InstanceType(self, obj, obj_type, obj_id):
+        if hasattr(obj, "__picklesize__"):
+            return self._LazyType(obj, obj_type, obj_id)
         self._seen.add(obj_id)
             
         size = 0
@@ -133,7 +130,17 @@ class FastPickleSize(object):
 
         return size
     
+    def _PlaceHolderType(self, obj, obj_type, obj_id):
+        return self._lazy_size(obj_id, obj.size)
+
+    def _LazyType(self, obj, obj_type, obj_id):
+        self._seen.add(obj_id)
+        return self._lazy_size(obj_id, obj.__picklesize__, self._protocol)
+    
     def _Generic(self, obj, obj_type, obj_id):
+        if hasattr(obj_type, "__picklesize__"):
+            return self._LazyType(obj, obj_type, obj_id)
+
         reducer = copy_reg.dispatch_table.get(obj_type)
         if reducer:
             reduced_obj = reducer(obj)
@@ -239,7 +246,8 @@ class FastPickleSize(object):
         types.FunctionType:_ModuleElementType,
         types.ClassType:_ModuleElementType,
         types.InstanceType:_InstanceType,
-        types.BuiltinFunctionType:_ModuleElementType
+        types.BuiltinFunctionType:_ModuleElementType,
+        PlaceHolder:_PlaceHolderType
     }
     
 
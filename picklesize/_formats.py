@@ -0,0 +1,34 @@
+import pickle
+
+from _picklesize import PickleSize
+from _marshalsize import MarshalSize
+from _jsonsize import JsonSize
+from _msgpacksize import MsgpackSize
+
+# Estimates the size of an object in the default configuration of each
+# serialization format.
+estimators = {
+    "pickle":lambda obj:PickleSize().picklesize(obj, pickle.HIGHEST_PROTOCOL),
+    "marshal":lambda obj:MarshalSize().marshalsize(obj),
+    "json":lambda obj:JsonSize().jsonsize(obj),
+    "msgpack":lambda obj:MsgpackSize().msgpacksize(obj),
+}
+
+def formatsizes(obj, formats=None):
+    """
+    Returns a dict mapping format names ('pickle', 'marshal', 'json' and
+    'msgpack') to the size `obj` would have in that format. The size is
+    `None` if the format cannot serialize `obj`.
+
+    `formats` can restrict the formats to calculate.
+    """
+    if formats is None:
+        formats = estimators.keys()
+
+    sizes = {}
+    for name in formats:
+        try:
+            sizes[name] = estimators[name](obj)
+        except (TypeError, ValueError, OverflowError, pickle.PicklingError):
+            sizes[name] = None
+    return sizes
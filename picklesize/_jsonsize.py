@@ -0,0 +1,123 @@
+import types
+import sys
+import re
+
+from _core import SizeEstimator
+
+# Characters `json` writes unescaped with `ensure_ascii=True`.
+_SAFE = "".join(chr(c) for c in range(0x20, 0x7f) if chr(c) not in '"\\')
+_SAFE_UNICODE = dict((ord(c), None) for c in _SAFE)
+
+# Characters with a two character escape sequence such as `\n`.
+# All others are written as `\uXXXX`.
+_SHORT = '"\\\b\f\n\r\t'
+_SHORT_UNICODE = dict((ord(c), None) for c in _SHORT)
+
+_ASCII = "".join(chr(c) for c in range(0x80))
+
+if sys.maxunicode > 0xFFFF:
+    # Written as a surrogate pair, `\uXXXX\uXXXX`.
+    _ASTRAL = re.compile(u"[\U00010000-\U0010FFFF]")
+else:
+    _ASTRAL = None
+
+
+class JsonSize(SizeEstimator):
+    """
+    Calculates the size of `json.dumps(obj)` with the default arguments
+    without serializing the object.
+    """
+
+    def jsonsize(self, obj):
+        # ids of the containers we are currently in, to detect cycles.
+        self._markers = set()
+        return self._traverse(obj)
+
+    def _Constant(self, obj, obj_type, obj_id):
+        # null, true, false
+        return 4 if obj is not False else 5
+
+    def _IntType(self, value, obj_type, obj_id):
+        return len(str(value))
+
+    def _FloatType(self, value, obj_type, obj_id):
+        if value != value:
+            return 3 # NaN
+        if value in (float("inf"), float("-inf")):
+            return 8 if value > 0 else 9 # Infinity, -Infinity
+        return len(repr(value))
+
+    def _StringType(self, obj, obj_type, obj_id):
+        special = obj.translate(None, _SAFE)
+        if special.translate(None, _ASCII):
+            # Non-ASCII bytes are decoded as UTF-8 and then escaped.
+            return self._UnicodeType(obj.decode("utf-8"), obj_type, obj_id)
+        nshort = len(special) - len(special.translate(None, _SHORT))
+        return 2 + len(obj) + nshort + 5*(len(special) - nshort)
+
+    def _UnicodeType(self, obj, obj_type, obj_id):
+        special = obj.translate(_SAFE_UNICODE)
+        nshort = len(special) - len(special.translate(_SHORT_UNICODE))
+        size = 2 + len(obj) + nshort + 5*(len(special) - nshort)
+        if _ASTRAL is not None:
+            size += 6*len(_ASTRAL.findall(special))
+        return size
+
+    def _enter(self, obj_id):
+        if obj_id in self._markers:
+            raise ValueError("Circular reference detected")
+        self._markers.add(obj_id)
+
+    def _SequenceType(self, obj, obj_type, obj_id):
+        if not obj:
+            return 2
+        self._enter(obj_id)
+        # brackets and a ', ' between the elements.
+        size = 2*len(obj)
+        for e in obj:
+            size += self._traverse(e)
+        self._markers.remove(obj_id)
+        return size
+
+    def _key(self, key):
+        if key is None:
+            return 6 # "null"
+        if type(key) is types.BooleanType:
+            # Booleans are integers here and written by their `str`.
+            return 2 + len(str(key))
+        if isinstance(key, basestring):
+            return self._traverse(key)
+        if isinstance(key, (int, long, float)):
+            return 2 + self._traverse(key)
+        raise TypeError("key %r is not a string" % (key,))
+
+    def _DictType(self, obj, obj_type, obj_id):
+        if not obj:
+            return 2
+        self._enter(obj_id)
+        # braces, ', ' between the items and ': ' between key and value.
+        size = 4*len(obj)
+        for k, v in obj.iteritems():
+            size += self._key(k) + self._traverse(v)
+        self._markers.remove(obj_id)
+        return size
+
+    def _unsupported(self, obj):
+        return TypeError(repr(obj) + " is not JSON serializable")
+
+    _handlers = {
+        types.NoneType:_Constant,
+        types.BooleanType:_Constant,
+        types.IntType:_IntType,
+        types.LongType:_IntType,
+        types.FloatType:_FloatType,
+        types.StringType:_StringType,
+        types.UnicodeType:_UnicodeType,
+        types.TupleType:_SequenceType,
+        types.ListType:_SequenceType,
+        types.DictType:_DictType,
+    }
+
+
+def jsonsize(obj):
+    return JsonSize().jsonsize(obj)
@@ -0,0 +1,156 @@
+import types
+import marshal
+
+from _core import SizeEstimator
+
+
+try:
+    import ctypes
+
+    # `ob_sstate` is the `int` right before the characters of the string.
+    _SSTATE_OFFSET = str.__basicsize__ - 1 - ctypes.sizeof(ctypes.c_int)
+
+    def _is_interned(s):
+        # Reads `ob_sstate` of the `PyStringObject` without copying or
+        # hashing `s`.
+        return ctypes.c_int.from_address(id(s) + _SSTATE_OFFSET).value != 0
+
+except ImportError:
+    def _is_interned(s):
+        # `intern` returns the interned string equal to `s`. Passing a copy
+        # makes sure we don't intern `s` itself as a side effect.
+        return intern(str(buffer(s))) is s
+
+# `marshal` refuses to write objects nested deeper than this.
+_MAX_DEPTH = 2000
+
+
+class MarshalSize(SizeEstimator):
+    """
+    Calculates the size of `marshal.dumps(obj, version)` without
+    serializing the object.
+    """
+
+    def marshalsize(self, obj, version=marshal.version):
+        if not 0 <= version <= 2:
+            raise ValueError("MarshalSize only supports marshal versions 0 to 2.")
+        self._version = version
+
+        # Interned strings are referenced by index once written.
+        self._strings = {}
+
+        # Number of containers we are currently in and their ids.
+        self._depth = 0
+        self._markers = set()
+
+        return self._traverse(obj)
+
+    def _IntType(self, value, obj_type, obj_id):
+        y = value >> 31
+        if y and y != -1:
+            return 9
+        return 5
+
+    def _LongType(self, value, obj_type, obj_id):
+        # Marshal stores longs as 15 bit digits of two bytes each.
+        ndigits = (abs(value).bit_length() + 14) // 15
+        return 5 + 2*ndigits
+
+    def _encode_float(self, value):
+        if self._version > 1:
+            return 8
+        return 1 + len("%.17g" % value)
+
+    def _FloatType(self, value, obj_type, obj_id):
+        return 1 + self._encode_float(value)
+
+    def _ComplexType(self, value, obj_type, obj_id):
+        return 1 + self._encode_float(value.real) + self._encode_float(value.imag)
+
+    def _StringType(self, obj, obj_type, obj_id):
+        if self._version > 0 and _is_interned(obj):
+            if obj in self._strings:
+                return 5
+            self._strings[obj] = len(self._strings)
+        return 5 + len(obj)
+
+    def _UnicodeType(self, obj, obj_type, obj_id):
+        return 5 + len(obj.encode("utf-8"))
+
+    def _enter(self, obj_id, nonempty):
+        # The elements count towards the depth as well. A container that
+        # contains itself would be nested without end.
+        self._depth += 1
+        if nonempty and (self._depth >= _MAX_DEPTH or obj_id in self._markers):
+            raise ValueError("object too deeply nested to marshal")
+        self._markers.add(obj_id)
+
+    def _leave(self, obj_id):
+        self._depth -= 1
+        self._markers.remove(obj_id)
+
+    def _SequenceType(self, obj, obj_type, obj_id):
+        self._enter(obj_id, obj)
+        size = 5
+        for e in obj:
+            size += self._traverse(e)
+        self._leave(obj_id)
+        return size
+
+    def _DictType(self, obj, obj_type, obj_id):
+        self._enter(obj_id, obj)
+        # Terminated by a NULL marker instead of storing the length.
+        size = 2
+        for k, v in obj.iteritems():
+            size += self._traverse(k) + self._traverse(v)
+        self._leave(obj_id)
+        return size
+
+    def _CodeType(self, obj, obj_type, obj_id):
+        self._enter(obj_id, True)
+        size = 1 + 4*4
+        size += self._traverse(obj.co_code)
+        size += self._traverse(obj.co_consts)
+        size += self._traverse(obj.co_names)
+        size += self._traverse(obj.co_varnames)
+        size += self._traverse(obj.co_freevars)
+        size += self._traverse(obj.co_cellvars)
+        size += self._traverse(obj.co_filename)
+        size += self._traverse(obj.co_name)
+        size += 4
+        size += self._traverse(obj.co_lnotab)
+        self._leave(obj_id)
+        return size
+
+    def _Generic(self, obj, obj_type, obj_id):
+        if obj is StopIteration or obj is Ellipsis:
+            return 1
+
+        # Everything else that exposes a single segment buffer is
+        # written as a plain string.
+        try:
+            n = len(buffer(obj))
+        except TypeError:
+            raise ValueError("unmarshallable object")
+        return 5 + n
+
+    _handlers = {
+        types.NoneType:lambda self, obj, obj_type, obj_id:1,
+        types.BooleanType:lambda self, obj, obj_type, obj_id:1,
+        types.IntType:_IntType,
+        types.LongType:_LongType,
+        types.FloatType:_FloatType,
+        types.ComplexType:_ComplexType,
+        types.StringType:_StringType,
+        types.UnicodeType:_UnicodeType,
+        types.TupleType:_SequenceType,
+        types.ListType:_SequenceType,
+        types.DictType:_DictType,
+        set:_SequenceType,
+        frozenset:_SequenceType,
+        types.CodeType:_CodeType,
+    }
+
+
+def marshalsize(obj, version=marshal.version):
+    return MarshalSize().marshalsize(obj, version)
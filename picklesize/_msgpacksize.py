@@ -0,0 +1,121 @@
+import types
+
+from _core import SizeEstimator
+
+# `msgpack.packb` refuses to write objects nested deeper than this.
+_MAX_DEPTH = 512
+
+
+class MsgpackSize(SizeEstimator):
+    """
+    Calculates the size of `msgpack.packb(obj)` without serializing the
+    object. The `msgpack` package is not required.
+
+    With `use_bin_type=False`, the default of the `msgpack` releases that
+    still support Python 2, byte strings and unicode strings are both
+    written with the (old) raw type.
+    """
+
+    def msgpacksize(self, obj, use_bin_type=False):
+        self._use_bin_type = use_bin_type
+
+        # Number of containers we are currently in and their ids.
+        self._depth = 0
+        self._markers = set()
+
+        return self._traverse(obj)
+
+    def _IntType(self, value, obj_type, obj_id):
+        if -0x20 <= value < 0x80:
+            return 1
+        if -0x80 <= value <= 0xFF:
+            return 2
+        if -0x8000 <= value <= 0xFFFF:
+            return 3
+        if -0x80000000 <= value <= 0xFFFFFFFF:
+            return 5
+        if -0x8000000000000000 <= value <= 0xFFFFFFFFFFFFFFFF:
+            return 9
+        raise OverflowError("Integer value out of range")
+
+    def _raw_header(self, n):
+        if n <= 0x1F:
+            return 1
+        elif self._use_bin_type and n <= 0xFF:
+            return 2
+        elif n <= 0xFFFF:
+            return 3
+        elif n <= 0xFFFFFFFF:
+            return 5
+        raise ValueError("String is too large")
+
+    def _StringType(self, obj, obj_type, obj_id):
+        n = len(obj)
+        if not self._use_bin_type:
+            return self._raw_header(n) + n
+        if n <= 0xFF:
+            return 2 + n
+        elif n <= 0xFFFF:
+            return 3 + n
+        elif n <= 0xFFFFFFFF:
+            return 5 + n
+        raise ValueError("Bytes is too large")
+
+    def _UnicodeType(self, obj, obj_type, obj_id):
+        n = len(obj.encode("utf-8"))
+        return self._raw_header(n) + n
+
+    def _container_header(self, n):
+        if n <= 0x0F:
+            return 1
+        elif n <= 0xFFFF:
+            return 3
+        elif n <= 0xFFFFFFFF:
+            return 5
+        raise ValueError("Container is too large")
+
+    def _enter(self, obj_id, nonempty):
+        # The elements count towards the depth as well. A container that
+        # contains itself would be nested without end.
+        self._depth += 1
+        if nonempty and (self._depth >= _MAX_DEPTH or obj_id in self._markers):
+            raise ValueError("recursion limit exceeded.")
+        self._markers.add(obj_id)
+
+    def _leave(self, obj_id):
+        self._depth -= 1
+        self._markers.remove(obj_id)
+
+    def _SequenceType(self, obj, obj_type, obj_id):
+        self._enter(obj_id, obj)
+        size = self._container_header(len(obj))
+        for e in obj:
+            size += self._traverse(e)
+        self._leave(obj_id)
+        return size
+
+    def _DictType(self, obj, obj_type, obj_id):
+        self._enter(obj_id, obj)
+        size = self._container_header(len(obj))
+        for k, v in obj.iteritems():
+            size += self._traverse(k) + self._traverse(v)
+        self._leave(obj_id)
+        return size
+
+    _handlers = {
+        types.NoneType:lambda self, obj, obj_type, obj_id:1,
+        types.BooleanType:lambda self, obj, obj_type, obj_id:1,
+        types.IntType:_IntType,
+        types.LongType:_IntType,
+        types.FloatType:lambda self, obj, obj_type, obj_id:9,
+        types.StringType:_StringType,
+        bytearray:_StringType,
+        types.UnicodeType:_UnicodeType,
+        types.TupleType:_SequenceType,
+        types.ListType:_SequenceType,
+        types.DictType:_DictType,
+    }
+
+
+def msgpacksize(obj, use_bin_type=False):
+    return MsgpackSize().msgpacksize(obj, use_bin_type)
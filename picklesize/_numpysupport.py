@@ -1,32 +1,72 @@
 import _picklesize
 from picklesize import _fastpicklesize
+import _dedup
+import _cost
+import hashlib
 
 try:
     import numpy.core.multiarray
-    
-    def fast_estimate_ndarray(est, obj, obj_type, obj_id):
-        est._seen.add(obj_id)
-        return obj.nbytes
+    import numpy.ma
 
-    def estimate_ndarray(est, obj, obj_type, obj_id):
-        
-        # During pickle, the actual data will be stored in a string of
-        # `n` bytes.
-        n = obj.nbytes
-        # The size of this string depends on how pickle encodes the length
-        if n <= 0xFF:
-            size = 2 + n
+    class _ArrayItems(object):
+        """
+        Stands for the list of elements numpy pickles instead of the
+        data string if the dtype contains objects.
+        """
+        def __init__(self, array):
+            self.array = array
+
+        def __iter__(self):
+            array = self.array
+            if array.dtype.fields is None:
+                # The elements of the base class, `MaskedArray.flat`
+                # returns `masked` for masked elements.
+                return numpy.ndarray.flat.__get__(array)
+            # Structured elements are pickled as tuples, numpy creates
+            # the list of them first.
+            return iter([numpy.ndarray.item(array, i) for i in xrange(array.size)])
+
+    # Bytes per part of the data string for protocol 0.
+    _CHUNK_BYTES = 64*1024
+
+    def _data_string(n, data, chunks=None):
+        """
+        Returns an object with the pickled size of the data string.
+        `data` returns the actual string, it is only called for strings
+        of one byte or less since python shares those instances, and
+        for protocol 0 unless there are `chunks`.
+        """
+        if n <= 1:
+            return data()
+        return _picklesize._DataString(n, data, chunks)
+
+    def _data_chunks(obj):
+        """
+        Yields the string of `tobytes('A')` in parts of about
+        `_CHUNK_BYTES`, only a part of the data is copied at a time.
+        """
+        if numpy.isfortran(obj):
+            obj = numpy.ndarray.transpose(obj)
+        flat = numpy.ndarray.flat.__get__(obj)
+        step = max(1, _CHUNK_BYTES // obj.itemsize)
+        for start in xrange(0, obj.size, step):
+            yield numpy.ndarray.tobytes(flat[start:start + step])
+
+    def _data_state(est, obj):
+        """
+        The state numpy's `ndarray.__reduce__` returns, with the data
+        replaced by objects of the same size.
+        """
+        if obj.dtype.hasobject:
+            data = _ArrayItems(obj)
         else:
-            size = 5 + n
-        # We assume that the string would be unique. This is quite likely
-        # Since numpy probably creates it on the fly.
-        dummy = object()
-        size += est._memorize(dummy, id(dummy))
-        
-        placeholder = _picklesize.PlaceHolder(size)
-        
-        reconstruct = numpy.core.multiarray._reconstruct
-        
+            # During pickle, the actual data will be stored in a string of
+            # `n` bytes.
+            data = _data_string(obj.nbytes, lambda:numpy.ndarray.tobytes(obj, 'A'),
+                                lambda:_data_chunks(obj))
+        return (1, obj.shape, obj.dtype, numpy.isfortran(obj), data)
+
+    def _zero_tuple():
         # This is almost identical to::
         #   zero_tuple = (0, )
         # With one difference, python 2.7.? is smart enough to see that
@@ -37,21 +77,92 @@ try:
         # is only three bytes, but we might as well do it right.
         # This code is sufficiently complicated to stop the compiler
         # from seeing it as a constant.
-        zero_tuple = ((lambda:0)(), )
-        
-        args = (numpy.ndarray, zero_tuple, 'b')
-        state = (1, obj.shape, obj.dtype, numpy.isfortran(obj), placeholder)
+        return ((lambda:0)(), )
+
+    # `MaskedArray.__reduce__` on the other hand uses a constant.
+    _ma_zero_tuple = (0, )
+
+    def fast_estimate_ndarray(est, obj, obj_type, obj_id):
+        est._seen.add(obj_id)
+        size = est._traverse(obj.dtype)
+        if obj.dtype.hasobject:
+            for e in _ArrayItems(obj):
+                size += est._traverse(e)
+            return size
+        return size + obj.nbytes
+
+    def estimate_ndarray(est, obj, obj_type, obj_id):
+        # `ndarray` subclasses that don't overwrite `__reduce__`, such as
+        # `memmap`, are reconstructed with their own type.
+        reduced = (numpy.core.multiarray._reconstruct,
+                   (obj_type, _zero_tuple(), 'b'),
+                   _data_state(est, obj))
+        return est._save_reduced(obj, reduced)
+
+    def estimate_array_items(est, obj, obj_type, obj_id):
+        # Like `_ListType`
+        if obj.array.size:
+            size = est._memorize_always(obj, obj_id)
+        else:
+            size = est._memorize(obj, obj_id)
+        size += 1 if est._bin else 2
+        for e in obj:
+            size += est._traverse_item(e)
+        size += est._batch_append_overhead(obj.array.size)
+        return size
 
-        
-        size = est.save_reduce(reconstruct, args, state=state, obj=obj)
+    def fast_estimate_masked_array(est, obj, obj_type, obj_id):
+        size = fast_estimate_ndarray(est, obj, obj_type, obj_id)
+        size += obj.size * numpy.ma.make_mask_descr(obj.dtype).itemsize
+        size += est._traverse(obj._fill_value)
         return size
-    
+
+    def estimate_masked_array(est, obj, obj_type, obj_id):
+        cf = 'CF'[obj.flags.fnc]
+        n = obj.size * numpy.ma.make_mask_descr(obj.dtype).itemsize
+        mask = lambda:numpy.ma.getmaskarray(obj).tobytes(cf)
+
+        reduced = (numpy.ma.core._mareconstruct,
+                   (obj.__class__, obj._baseclass, _ma_zero_tuple, 'b'),
+                   _data_state(est, obj) + (_data_string(n, mask), obj._fill_value))
+        return est._save_reduced(obj, reduced)
+
+    def fast_estimate_scalar(est, obj, obj_type, obj_id):
+        est._seen.add(obj_id)
+        return est._traverse(obj.dtype) + obj.itemsize
+
+    def estimate_scalar(est, obj, obj_type, obj_id):
+        # The payload has `itemsize` bytes, but `tobytes` of empty flexible
+        # scalars, such as `unicode_(u'')`, does not match it.
+        payload = lambda:obj.__reduce__()[1][1]
+        reduced = (numpy.core.multiarray.scalar,
+                   (obj.dtype, _data_string(obj.itemsize, payload)))
+        return est._save_reduced(obj, reduced)
+
+    def fingerprint_ndarray(analysis, obj):
+        if obj.dtype.hasobject or obj.nbytes > analysis.array_threshold:
+            return None
+        digest = hashlib.sha1(obj.tobytes('A')).digest()
+        return numpy.ndarray, obj.dtype, obj.shape, numpy.isfortran(obj), digest
+
     # Register
-    _picklesize.PickleSize._handlers[numpy.ndarray] = estimate_ndarray
-    _fastpicklesize.FastPickleSize._handlers[numpy.ndarray] = fast_estimate_ndarray
-    #_picklesize.custom_estimators[numpy.ndarray] = estimate_ndarray
+    for array_type in [numpy.ndarray, numpy.memmap, numpy.recarray, numpy.matrix]:
+        _picklesize.PickleSize._handlers[array_type] = estimate_ndarray
+        _fastpicklesize.FastPickleSize._handlers[array_type] = fast_estimate_ndarray
+
+    _picklesize.PickleSize._handlers[_ArrayItems] = estimate_array_items
+    # Like a list, also if it is empty.
+    _cost.PickleCost._opcode_counters[_ArrayItems] = lambda est, obj, own_size:own_size
+    _dedup.DedupAnalysis._fingerprinters[numpy.ndarray] = fingerprint_ndarray
+
+    _picklesize.PickleSize._handlers[numpy.ma.MaskedArray] = estimate_masked_array
+    _fastpicklesize.FastPickleSize._handlers[numpy.ma.MaskedArray] = fast_estimate_masked_array
+
+    for scalar_type in set(numpy.sctypeDict.values()):
+        if scalar_type is not numpy.object_:
+            _picklesize.PickleSize._handlers[scalar_type] = estimate_scalar
+            _fastpicklesize.FastPickleSize._handlers[scalar_type] = fast_estimate_scalar
 
-    
 except ImportError:
     pass
 
@@ -60,4 +171,4 @@ except ImportError:
 
 
 
-__all__ = []
\ No newline at end of file
+__all__ = []
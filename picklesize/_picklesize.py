@@ -1,8 +1,11 @@
 import types
 import pickle
 import sys
+import copy
 import copy_reg
 
+from _core import SizeEstimator, SizeBounds
+
 class PlaceHolder(object):
     """
     Instances of this class cause the estimate to increase by a set amount
@@ -10,6 +13,12 @@ class PlaceHolder(object):
     This can be used to correctly estimate the pickle size of large objects
     without actually constructing the object if there is some alternative
     way of estimating the size of it.
+
+    `size` can also be `SizeBounds` if the size is only known roughly, or
+    a callable returning either. The callable is only called when the
+    estimator reaches the placeholder, once per estimate, so that sizes
+    that are expensive to determine, for example with `os.stat`, are only
+    determined if needed.
     """
     def __init__(self, size):
         self.size = size
@@ -17,88 +26,365 @@ class PlaceHolder(object):
     def __repr__(self):
         return "PlaceHolder(%r)" % self.size
 
-class PickleSize(object):
+class _DataString(object):
+    """
+    Stands for a string of `n` bytes that the reducer of an object
+    creates on the fly, so that we don't have to create it. `data`
+    returns the actual string, it is only called for protocol 0 where
+    the size depends on the content. For large strings, `chunks` can
+    return an iterator over the parts of the string instead.
+    """
+    def __init__(self, n, data=None, chunks=None):
+        self.n = n
+        self.data = data
+        self.chunks = chunks
+
+class _Sentinel(object):
+    """
+    Passed through `_traverse` to measure the references the estimator
+    holds itself.
+    """
+
+class _CountingSink(object):
+    """
+    File-like object that only counts the bytes written to it.
+    """
+    def __init__(self):
+        self.size = 0
+
+    def write(self, data):
+        self.size += len(data)
+
+class _ExactPickler(pickle.Pickler):
+    """
+    `pickle.Pickler` that writes the objects the estimator cannot model
+    into a `_CountingSink` and passes all others back to the estimator,
+    which adds their size to the sink. This way placeholders, objects
+    with `__picklesize__` and numpy arrays are sized as usual. The memo
+    is the one of the estimator, which also decides what to memorize.
+    """
+    def __init__(self, estimator):
+        self.sink = _CountingSink()
+        pickle.Pickler.__init__(self, self.sink, estimator._protocol)
+        self.memo = estimator._seen
+        self.estimator = estimator
+
+    def save(self, obj):
+        estimator = self.estimator
+        if estimator._cpickle:
+            # Held by `sys.getrefcount`, `obj` and the frame of `pickle`
+            # that passes it, about like cPickle holds on to it.
+            estimator._known_references.setdefault(id(obj), sys.getrefcount(obj) - 3)
+        self.sink.size += estimator._traverse(obj)
+
+    def save_reduce(self, func, args, state=None, listitems=None,
+                    dictitems=None, obj=None):
+        estimator = self.estimator
+        if estimator._cpickle:
+            # Only the reduce value refers to them, as in `_save_reduced`.
+            # Held by `sys.getrefcount`, the parameter and the `*` arguments
+            # of the call besides.
+            estimator._known_references.setdefault(id(args), sys.getrefcount(args) - 3)
+            if state is not None:
+                estimator._known_references.setdefault(id(state), sys.getrefcount(state) - 3)
+        pickle.Pickler.save_reduce(self, func, args, state, listitems, dictitems, obj)
+
+    def memoize(self, obj):
+        self.sink.size += self.estimator._memorize(obj, id(obj))
+
+# Characters `repr` writes as they are, the quotes need extra care.
+_PRINTABLE = "".join(chr(c) for c in range(0x20, 0x7F) if chr(c) != "\\")
+
+def _repr_length(parts):
+    """
+    Returns `len(repr(s))` for the `str` made of the strings in `parts`
+    without creating the repr or the string.
+    """
+    size = 2
+    quotes = 0
+    double_quotes = False
+    for s in parts:
+        size += len(s)
+        special = s.translate(None, _PRINTABLE)
+        if special:
+            # `\\`, `\t`, `\n` and `\r` take two bytes, others are
+            # written as `\xhh`.
+            short = len(special) - len(special.translate(None, "\\\t\n\r"))
+            size += short + 3 * (len(special) - short)
+        quotes += s.count("'")
+        double_quotes = double_quotes or '"' in s
+    if quotes and not double_quotes:
+        # Quoted with `"`, no need to escape `'`.
+        return size
+    return size + quotes
+
+class PickleSize(SizeEstimator):
+    """
+    Calculates the exact size of an object pickled with protocol 0, 1
+    or 2.
+
+    The `target` is the pickler the size is calculated for, `"pickle"`
+    or `"cPickle"`. They write the same opcodes but differ in what they
+    put into the memo: `cPickle` starts counting at one, never memorizes
+    strings of less than two characters and skips objects it holds the
+    only reference to. `pickle` reserves a memo entry to keep the
+    results of `__getinitargs__` and `__getstate__` alive.
+
+    In `hybrid` mode, objects whose reduce value the estimator cannot
+    model, such as `__reduce__` returning iterators for the list or dict
+    items, are written by a real `pickle.Pickler` into a sink that only
+    counts the bytes. Objects of the types in `fallback_types` are always
+    handled this way. The pickler passes the parts of these objects back
+    to the estimator and shares its memo, so the result stays exact and
+    placeholders or arrays within are not pickled.
+
+    Objects that are expensive to size, for example because they are not
+    loaded yet, can provide their size with a `__picklesize__(protocol)`
+    method instead. It returns the size of the object without the memo
+    opcodes, or `SizeBounds`, and is called at most once per estimate.
+
+    For `cPickle`, the reference counts of the objects are taken from
+    `sys.getrefcount` minus the references the estimator holds itself.
+    Those are measured once per class, so subclasses may wrap `_traverse`.
+    The top-level object is assumed to be held by a variable of the
+    caller, as in `cPickle.dumps(obj)`. For an object that only exists in
+    the expression, such as `cPickle.dumps("".join(parts))`, `cPickle`
+    writes no PUT for it and the size is smaller than estimated.
+    """
+
+    # Class -> references held by the estimator in `_traverse`
+    _reference_overheads = {}
+
+    def __init__(self, hybrid=False, fallback_types=(), target="pickle"):
+        if target not in ("pickle", "cPickle"):
+            raise ValueError("Unknown target %r, use 'pickle' or 'cPickle'." % (target, ))
+        self._hybrid = hybrid
+        self._fallback_types = frozenset(fallback_types)
+        self._cpickle = target == "cPickle"
     
     def picklesize(self, obj, protocol=0):
         
         if protocol < 0:
             protocol = 2
-        if protocol != 2:
-            raise ValueError("PickleSize only support pickle protocol 2.")
+        if protocol > 2:
+            raise ValueError("PickleSize only supports pickle protocols 0 to 2.")
         self._protocol = protocol
+        self._bin = protocol >= 1
         
         self._seen = {}
+        self._exact_pickler = None
+        self._reference_counts = {}
+        self._known_references = {}
+        self._pickler_reference = False
+        self._lazy_sizes = {}
+        self._slack = 0
+        if self._cpickle:
+            self._reference_overhead = self._get_reference_overhead()
         
-        return 3 + self._traverse(obj)
+        if protocol >= 2:
+            size = 3 # PROTO and STOP
+        else:
+            size = 1 # STOP
+        try:
+            # The variable of the caller and the arguments of `dumps`.
+            self._known_references[id(obj)] = 2
+            return size + self._traverse(obj)
+        finally:
+            # The memo and the caches refer to the objects, which would
+            # change the reference counts `cPickle` sees later on.
+            self._seen = None
+            self._exact_pickler = None
+            self._reference_counts = None
+            self._known_references = None
+            self._lazy_sizes = None
+
+    def picklesizebounds(self, obj, protocol=0):
+        """
+        Returns the `SizeBounds` of the pickled size. They only differ if
+        placeholders or `__picklesize__` return bounds, `picklesize`
+        returns the upper bound.
+        """
+        high = self.picklesize(obj, protocol)
+        return SizeBounds(high - self._slack, high)
     
     
+    def _get_reference_overhead(self):
+        """
+        Returns the references to an object that the estimator holds
+        itself when `_traverse` counts them. Measured with an object
+        that only a variable refers to, like the ones of the handlers.
+        """
+        cls = type(self)
+        overhead = self._reference_overheads.get(cls)
+        if overhead is None:
+            # A copy, so that the state of `self` stays as it is.
+            estimator = copy.copy(self)
+            estimator._reference_overhead = 0
+            estimator._pickler_reference = False
+            estimator._reference_counts = {}
+            estimator._known_references = {}
+            estimator._seen = {}
+            sentinel = _Sentinel()
+            estimator._traverse(sentinel)
+            # Includes `sentinel`, which stands for the variable of the
+            # handler that calls `_traverse`.
+            overhead = estimator._reference_counts[id(sentinel)]
+            self._reference_overheads[cls] = overhead
+        return overhead
+
     def _traverse(self, obj):
         
         obj_id = id(obj)
+        if self._cpickle:
+            # cPickle doesn't memorize objects with a reference count
+            # below two.
+            references = self._known_references.pop(obj_id, None)
+            if references is None:
+                references = sys.getrefcount(obj) - self._reference_overhead
+                if self._pickler_reference:
+                    # One reference more held by cPickle, two by `_traverse_item`.
+                    references -= 1
+            self._pickler_reference = False
+            self._reference_counts[obj_id] = references
+
         ref = self._get_memory_ref(obj_id)
         if ref is not None:
             return self._encode_int(ref)
                 
-        obj_type = type(obj)
-        handler = self._handlers.get(obj_type, None)
-        
-        if handler is not None:
-            return handler(self, obj, obj_type, obj_id)
+        return self._dispatch(obj, type(obj), obj_id)
 
-        return self._Generic(obj, obj_type, obj_id)
+    def _traverse_item(self, obj):
+        """
+        Like `_traverse` for objects cPickle holds an extra reference to
+        while it writes them, such as the elements of lists.
+        """
+        self._pickler_reference = True
+        return self._traverse(obj)
             
     def _memorize(self, obj, obj_id):
         assert obj_id not in self._seen
         
-        ref = len(self._seen)
+        if self._cpickle:
+            if self._reference_counts.get(obj_id, 2) < 2:
+                return 0
+            if type(obj) in (str, unicode) and len(obj) < 2:
+                return 0
+            ref = len(self._seen) + 1
+        else:
+            ref = len(self._seen)
         self._seen[obj_id] = ref, obj
         
         return self._encode_int(ref)
     
+    def _memorize_always(self, obj, obj_id):
+        """
+        Like `_memorize` but cPickle memorizes the object regardless of
+        its reference count, since the object could refer to itself.
+        """
+        self._reference_counts.pop(obj_id, None)
+        return self._memorize(obj, obj_id)
+
+    def _add_reference(self, obj_id):
+        """
+        Counts a reference cPickle holds while it writes the object.
+        """
+        if obj_id in self._reference_counts:
+            self._reference_counts[obj_id] += 1
+
     def _get_memory_ref(self, obj_id):
         ref, obj = self._seen.get(obj_id, (None,None))
         return ref
+
+    def _keep_alive(self, obj):
+        """
+        `pickle` keeps `obj` alive in a list it stores in the memo, which
+        takes up a memo index.
+        """
+        if not self._cpickle:
+            pickle._keep_alive(obj, self._seen)
         
     def _encode_int(self, value):
+        if not self._bin:
+            # Text, such as 'p12\n'
+            return 2 + len(str(value))
         if value <= 0xFF:
             return 2
         else:
             return 5
+
+    def _BoolType(self, obj, obj_type, obj_id):
+        if self._protocol >= 2:
+            return 1
+        # Written as the int 0 or 1, such as 'I01\n'
+        return 4
         
     def _IntType(self, value, obj_type, obj_id):
+        if not self._bin:
+            # Text, such as 'I12\n'
+            return 2 + len(repr(value))
         if value >= 0:
             if value <= 0xFF:
                 return 2;
             elif value <= 0xFFFF:
                 return 3;
-        return 5;
+        high_bits = value >> 31
+        if high_bits == 0 or high_bits == -1:
+            return 5;
+        # Too big for four bytes, written as text.
+        return 2 + len(repr(value))
         
     def _LongType(self, value, obj_type, obj_id):
+        if self._protocol < 2:
+            # Text, such as 'L12L\n'
+            return 2 + len(repr(value))
         data = pickle.encode_long(value)
         n = len(data)
         if n <= 0xFF:
             return 2 + n
         else:
             return 5 + n
+
+    def _FloatType(self, value, obj_type, obj_id):
+        if self._bin:
+            return 9
+        # Text, such as 'F0.5\n'
+        if self._cpickle:
+            return 2 + len("%.17g" % value)
+        return 2 + len(repr(value))
         
     def _StringType(self, obj, obj_type, obj_id):
         n = len(obj)
-        if n <= 0xFF:
+        if not self._bin:
+            # The repr, such as "S'abc'\n"
+            size = 2 + _repr_length((obj, ))
+        elif n <= 0xFF:
             size = 2 + n
         else:
             size = 5 + n
         return size + self._memorize(obj, obj_id)
 
     def _UnicodeType(self, obj, obj_type, obj_id):
-        n = len(obj.encode("utf-8"))
-        return 5 + n + self._memorize(obj, obj_id)
+        if self._bin:
+            n = len(obj.encode("utf-8"))
+            return 5 + n + self._memorize(obj, obj_id)
+        # Raw unicode escape with `\` and newlines written as `\uXXXX`.
+        n = len(obj.encode("raw-unicode-escape"))
+        escapes = obj.count(u"\\") + obj.count(u"\n")
+        n += 5 * escapes
+        if escapes and not self._cpickle:
+            # pickle memorizes the escaped copy instead of `obj`.
+            escaped = object()
+            return 2 + n + self._memorize(escaped, id(escaped))
+        return 2 + n + self._memorize(obj, obj_id)
         
     def _TupleType(self, obj, obj_type, obj_id):
         n = len(obj)
         if n == 0:
-            return 1
+            if self._bin:
+                return 1
+            return 2 # MARK and TUPLE
         
-        if n <= 3:
+        if n <= 3 and self._protocol >= 2:
             size = sum(self._traverse(e) for e in obj)
             ref = self._get_memory_ref(obj_id)
             if ref is not None:
@@ -115,7 +401,10 @@ class PickleSize(object):
         ref = self._get_memory_ref(obj_id)
         if ref is not None:
             # one of the elements already encoded this tuple
-            size += 1 # pop
+            if self._bin:
+                size += 1 # POP_MARK
+            else:
+                size += n + 1 # POP for the elements and the MARK
             size += self._encode_int(ref) # GET from 'seen'
         else:
             size += 1
@@ -123,13 +412,24 @@ class PickleSize(object):
         return size
     
     def _ListType(self, obj, obj_type, obj_id):
-        size = 1 + self._memorize(obj, obj_id)
+        if obj:
+            size = self._memorize_always(obj, obj_id)
+        else:
+            size = self._memorize(obj, obj_id)
+        if self._bin:
+            size += 1
+        else:
+            size += 2 # MARK and LIST
         for e in obj:
-            size += self._traverse(e)
+            size += self._traverse_item(e)
         size += self._batch_append_overhead(len(obj))
         return size
     
     def _batch_append_overhead(self, n):
+        if not self._bin:
+            # APPEND or SETITEM for each item
+            return n
+
         batch = pickle.Pickler._BATCHSIZE
         
         batchcount = n / batch
@@ -144,31 +444,66 @@ class PickleSize(object):
         return size
     
     def _DictType(self, obj, obj_type, obj_id):
-        size = 1 + self._memorize(obj, obj_id)
-        for k, v in obj.iteritems():
-            size += self._traverse(k) + self._traverse(v)
+        if obj:
+            size = self._memorize_always(obj, obj_id)
+        else:
+            size = self._memorize(obj, obj_id)
+        if self._bin:
+            size += 1
+        else:
+            size += 2 # MARK and DICT
+        if self._cpickle and self._bin:
+            # cPickle writes the items straight from the dict, without
+            # the extra references the tuples of `iteritems` hold.
+            for k in obj:
+                v = obj[k]
+                size += self._traverse(k) + self._traverse(v)
+        else:
+            for k, v in obj.iteritems():
+                size += self._traverse(k) + self._traverse(v)
         size += self._batch_append_overhead(len(obj))
         return size
             
     def _InstanceType(self, obj, obj_type, obj_id):
+
+        if hasattr(obj, "__picklesize__"):
+            return self._LazyType(obj, obj_type, obj_id)
             
         if hasattr(obj, '__getinitargs__'):
             initargs = obj.__getinitargs__()
+            self._keep_alive(initargs)
+            # cPickle holds on to the bound method.
+            self._add_reference(obj_id)
         else:
             initargs = ()
 
-        size = 1 + self._traverse(obj.__class__)
+        getstate = getattr(obj, "__getstate__", None)
+        if getstate is not None:
+            attributes = getstate()
+        else:
+            attributes = obj.__dict__
+
+        cls = obj.__class__
+        size = 1 # MARK
+        if self._bin:
+            size += self._traverse_item(cls)
         for initarg in initargs:
-            size += self._traverse(initarg)
+            size += self._traverse_item(initarg)
+        if self._bin:
+            size += 1 # OBJ
+        else:
+            # INST with the module and the name of the class
+            size += 3 + len(cls.__module__) + len(cls.__name__)
             
-        size += 1 + self._memorize(obj, obj_id)
-
-        if hasattr(obj, "__getstate__"):
-            attributes = obj.__getstate__()
+        if isinstance(attributes, dict):
+            size += self._memorize(obj, obj_id)
         else:
-            attributes = obj.__dict__
+            size += self._memorize_always(obj, obj_id)
+
+        if getstate is not None:
+            self._keep_alive(attributes)
 
-        size += self._traverse(attributes)
+        size += self._traverse_item(attributes)
         return size + 1
     
     def _ModuleElementType(self, obj, obj_type, obj_id, name=None):
@@ -193,7 +528,10 @@ class PickleSize(object):
                     "Can't pickle %r: it's not the same object as %s.%s" %
                     (obj, modulename, name))
 
-        code = copy_reg._extension_registry.get((modulename, name))
+        if self._protocol >= 2:
+            code = copy_reg._extension_registry.get((modulename, name))
+        else:
+            code = None
         if code:
             assert code > 0
             if code <= 0xFF:
@@ -209,14 +547,75 @@ class PickleSize(object):
         return size
     
     def _PlaceHolderType(self, obj, obj_type, obj_id):
-        return obj.size
+        return self._lazy_size(obj_id, obj.size)
+
+    def _LazyType(self, obj, obj_type, obj_id):
+        size = self._lazy_size(obj_id, obj.__picklesize__, self._protocol)
+        return size + self._memorize(obj, obj_id)
+
+    def _DataStringType(self, obj, obj_type, obj_id):
+        # The size of this string depends on how pickle encodes the length
+        n = obj.n
+        if not self._bin:
+            if obj.chunks is not None:
+                size = 2 + _repr_length(obj.chunks())
+            else:
+                size = 2 + _repr_length((obj.data(), ))
+        elif n <= 0xFF:
+            size = 2 + n
+        else:
+            size = 5 + n
+        # The string is unique since the reducer creates it on the fly.
+        return size + self._memorize(obj, obj_id)
+    
+    def _save_exact(self, obj, reduced_obj=None):
+        """
+        Writes `obj`, or its reduce value, with `_ExactPickler` and returns
+        the number of bytes written.
+        """
+        if self._exact_pickler is None:
+            self._exact_pickler = _ExactPickler(self)
+        sink = self._exact_pickler.sink
+
+        start = sink.size
+        if reduced_obj is None:
+            if type(obj) not in copy_reg.dispatch_table:
+                # cPickle holds on to the bound `__reduce_ex__`.
+                self._add_reference(id(obj))
+            pickle.Pickler.save(self._exact_pickler, obj)
+        else:
+            self._exact_pickler.save_reduce(obj=obj, *reduced_obj)
+        size = sink.size - start
+        # The caller adds the size, also if it is the pickler itself.
+        sink.size = start
+        return size
+
+    def _is_modeled(self, reduced_obj):
+        """
+        Checks if `save_reduce` can calculate the size of a reduce value.
+        """
+        listitems = reduced_obj[3] if len(reduced_obj) > 3 else None
+        dictitems = reduced_obj[4] if len(reduced_obj) > 4 else None
+        if listitems is not None and not isinstance(listitems, (list, tuple)):
+            return False
+        if dictitems is not None and not isinstance(dictitems, dict):
+            return False
+        return True
     
     def _Generic(self, obj, obj_type, obj_id):
         
+        if obj_type in self._fallback_types:
+            return self._save_exact(obj)
+
+        if hasattr(obj_type, "__picklesize__"):
+            return self._LazyType(obj, obj_type, obj_id)
+
         reducer = copy_reg.dispatch_table.get(obj_type)
         if reducer:
             reduced_obj = reducer(obj)
+            reduce_method = False
         else:
+            reduce_method = True
             try:
                 ismetaclass = issubclass(obj_type, types.TypeType)
             except TypeError:
@@ -246,7 +645,27 @@ class PickleSize(object):
             raise pickle.PicklingError("Tuple returned by %s must have "
                                 "two to five elements" % reduce)
 
+        return self._save_reduced(obj, reduced_obj, reduce_method)
 
+    def _save_reduced(self, obj, reduced_obj, reduce_method=True):
+        """
+        Calls `save_reduce` with the reduce value of `obj`. Handlers
+        should build `reduced_obj` in place so that, like in the reduce
+        value of pickle, it holds the only reference to its parts.
+        `reduce_method` is false if the reducer is not a method of `obj`
+        but from `copy_reg.dispatch_table`.
+        """
+        if self._cpickle:
+            if reduce_method:
+                # cPickle holds on to the bound method.
+                self._add_reference(id(obj))
+            # Counted here since passing them to `save_reduce` adds
+            # references we can't tell apart.
+            for i in (1, 2):
+                if i < len(reduced_obj) and reduced_obj[i] is not None:
+                    self._known_references[id(reduced_obj[i])] = sys.getrefcount(reduced_obj[i]) - 1
+        if self._hybrid and not self._is_modeled(reduced_obj):
+            return self._save_exact(obj, reduced_obj)
         return self.save_reduce(obj=obj, *reduced_obj)
         
     def save_reduce(self, factory_function, args, state=None,
@@ -258,7 +677,7 @@ class PickleSize(object):
         if not hasattr(factory_function, '__call__'):
             raise pickle.PicklingError("func from reduce should be callable")
 
-        if getattr(factory_function, "__name__", "") == "__newobj__":
+        if self._protocol >= 2 and getattr(factory_function, "__name__", "") == "__newobj__":
             
             cls = args[0]
             if not hasattr(cls, "__new__"):
@@ -267,6 +686,7 @@ class PickleSize(object):
             if obj is not None and cls is not obj.__class__:
                 raise pickle.PicklingError(
                     "args[0] from __newobj__ args has the wrong class")
+            self._known_references.pop(id(args), None)
             args = args[1:]
             
             size = 1
@@ -279,11 +699,14 @@ class PickleSize(object):
             size += 1
 
         if obj is not None:
-            size += self._memorize(obj, id(obj))
+            if state is None or isinstance(state, dict):
+                size += self._memorize(obj, id(obj))
+            else:
+                size += self._memorize_always(obj, id(obj))
 
         if listitems is not None:
             for e in listitems:
-                size += self._traverse(e)
+                size += self._traverse_item(e)
             size += self._batch_append_overhead(len(listitems))
 
         if dictitems is not None:
@@ -301,10 +724,10 @@ class PickleSize(object):
     _handlers = {
         types.NoneType:lambda self, obj, obj_type, obj_id:1,
         types.TypeType:_ModuleElementType,
-        types.BooleanType:lambda self, obj, obj_type, obj_id:1,
+        types.BooleanType:_BoolType,
         types.IntType:_IntType,
         types.LongType:_LongType,
-        types.FloatType:lambda self, obj, obj_type, obj_id:9,
+        types.FloatType:_FloatType,
         types.StringType:_StringType,
         types.UnicodeType:_UnicodeType,
         types.TupleType:_TupleType,
@@ -314,10 +737,15 @@ class PickleSize(object):
         types.ClassType:_ModuleElementType,
         types.InstanceType:_InstanceType,
         types.BuiltinFunctionType:_ModuleElementType,
-        PlaceHolder:_PlaceHolderType
+        PlaceHolder:_PlaceHolderType,
+        _DataString:_DataStringType,
+        _Sentinel:lambda self, obj, obj_type, obj_id:0
     }
     
 
-def picklesize(obj, protocol=0):
-    return PickleSize().picklesize(obj, protocol)
+def picklesize(obj, protocol=0, hybrid=False, fallback_types=(), target="pickle"):
+    return PickleSize(hybrid, fallback_types, target).picklesize(obj, protocol)
+
+def picklesizebounds(obj, protocol=0, hybrid=False, fallback_types=(), target="pickle"):
+    return PickleSize(hybrid, fallback_types, target).picklesizebounds(obj, protocol)
 
@@ -0,0 +1,180 @@
+import datetime
+import decimal
+import array
+import uuid
+import copy_reg
+
+import _picklesize
+import _fastpicklesize
+import _cost
+
+# Size of the string `datetime` objects reduce to.
+_DATETIME_STATE_SIZE = {
+    datetime.datetime:10,
+    datetime.date:4,
+    datetime.time:6,
+}
+
+def _datetime_args(obj, obj_type):
+    # The state string is created on the fly.
+    state = _picklesize._DataString(_DATETIME_STATE_SIZE[obj_type],
+                                    lambda:obj.__reduce__()[1][0])
+    tzinfo = getattr(obj, "tzinfo", None)
+    if tzinfo is None:
+        return (state, )
+    return (state, tzinfo)
+
+def fast_estimate_datetime(est, obj, obj_type, obj_id):
+    est._seen.add(obj_id)
+    return _DATETIME_STATE_SIZE[obj_type] + est._traverse(getattr(obj, "tzinfo", None))
+
+def estimate_datetime(est, obj, obj_type, obj_id):
+    return est._save_reduced(obj, (obj_type, _datetime_args(obj, obj_type)))
+
+def fast_estimate_timedelta(est, obj, obj_type, obj_id):
+    est._seen.add(obj_id)
+    return 12
+
+def estimate_timedelta(est, obj, obj_type, obj_id):
+    return est._save_reduced(obj, (obj_type, (obj.days, obj.seconds, obj.microseconds)))
+
+
+def _decimal_string(obj):
+    """
+    Returns `str(obj)` or, if that would create a new string, a
+    placeholder of the same length.
+    """
+    if obj._is_special:
+        return str(obj)
+
+    # Same as `Decimal.__str__`
+    n = len(obj._int)
+    leftdigits = obj._exp + n
+    if obj._exp <= 0 and leftdigits > -6:
+        dotplace = leftdigits
+    else:
+        dotplace = 1
+
+    if dotplace <= 0:
+        length = 2 - dotplace + n
+    elif dotplace >= n:
+        length = dotplace
+    else:
+        length = n + 1
+    if leftdigits != dotplace:
+        length += 1 + len("%+d" % (leftdigits - dotplace))
+    length += obj._sign
+
+    if length == n or length <= 1:
+        # Only the digits, `str` returns `_int` itself.
+        return str(obj)
+    return _picklesize._DataString(length, obj.__str__)
+
+def fast_estimate_decimal(est, obj, obj_type, obj_id):
+    est._seen.add(obj_id)
+    s = _decimal_string(obj)
+    return len(s) if isinstance(s, str) else s.n
+
+def estimate_decimal(est, obj, obj_type, obj_id):
+    return est._save_reduced(obj, (obj_type, (_decimal_string(obj), )))
+
+
+class _ArrayList(object):
+    """
+    Stands for the list `array.array` reduces to.
+    """
+    def __init__(self, array):
+        self.array = array
+
+# Typical pickled size of the items of `array.array` which are written as
+# a list of python objects.
+_FAST_ITEM_SIZE = {
+    "c":2, "u":5+3+2, "b":2, "B":2, "h":3, "H":3,
+    "i":5, "I":5, "l":5, "L":5, "f":9, "d":9,
+}
+
+def fast_estimate_array(est, obj, obj_type, obj_id):
+    est._seen.add(obj_id)
+    return _FAST_ITEM_SIZE.get(obj.typecode, obj.itemsize) * len(obj)
+
+def estimate_array(est, obj, obj_type, obj_id):
+    reduced = (obj_type, (obj.typecode, _ArrayList(obj)), getattr(obj, "__dict__", None))
+    return est._save_reduced(obj, reduced)
+
+def estimate_array_list(est, obj, obj_type, obj_id):
+    items = obj.array
+    n = len(items)
+    typecode = items.typecode
+
+    # Like `_ListType`
+    if n:
+        size = est._memorize_always(obj, obj_id)
+    else:
+        size = est._memorize(obj, obj_id)
+    size += 1 if est._bin else 2
+    if typecode in "fd":
+        if est._bin:
+            # BINFLOAT
+            size += 9 * n
+        else:
+            for e in items:
+                size += est._FloatType(e, float, None)
+    elif typecode == "B" and est._bin:
+        # BININT1
+        size += 2 * n
+    elif typecode in "bBhHil":
+        for e in items:
+            size += est._IntType(e, int, None)
+    elif typecode in "IL":
+        # Items are longs
+        for e in items:
+            size += est._LongType(e, long, None)
+    else:
+        # Characters, python shares some of them.
+        for e in items:
+            size += est._traverse_item(e)
+    size += est._batch_append_overhead(n)
+    return size
+
+def count_array_list_opcodes(est, obj, own_size):
+    n = len(obj.array)
+    size = (1 if est._bin else 2) + est._batch_append_overhead(n)
+    if est._children:
+        # The characters are traversed.
+        return size
+    # The numbers are written without traversing them.
+    return size + n
+
+
+def fast_estimate_uuid(est, obj, obj_type, obj_id):
+    est._seen.add(obj_id)
+    return 16
+
+def estimate_uuid(est, obj, obj_type, obj_id):
+    if est._protocol < 2:
+        # Reduced with `copy_reg._reconstructor`
+        return est._Generic(obj, obj_type, obj_id)
+    return est._save_reduced(obj, (copy_reg.__newobj__, (obj_type, ), obj.__dict__))
+
+
+# Register
+for datetime_type in _DATETIME_STATE_SIZE:
+    _picklesize.PickleSize._handlers[datetime_type] = estimate_datetime
+    _fastpicklesize.FastPickleSize._handlers[datetime_type] = fast_estimate_datetime
+
+_picklesize.PickleSize._handlers[datetime.timedelta] = estimate_timedelta
+_fastpicklesize.FastPickleSize._handlers[datetime.timedelta] = fast_estimate_timedelta
+
+_picklesize.PickleSize._handlers[decimal.Decimal] = estimate_decimal
+_fastpicklesize.FastPickleSize._handlers[decimal.Decimal] = fast_estimate_decimal
+
+_picklesize.PickleSize._handlers[array.array] = estimate_array
+_picklesize.PickleSize._handlers[_ArrayList] = estimate_array_list
+_cost.PickleCost._opcode_counters[_ArrayList] = count_array_list_opcodes
+_fastpicklesize.FastPickleSize._handlers[array.array] = fast_estimate_array
+
+_picklesize.PickleSize._handlers[uuid.UUID] = estimate_uuid
+_fastpicklesize.FastPickleSize._handlers[uuid.UUID] = fast_estimate_uuid
+
+
+__all__ = []
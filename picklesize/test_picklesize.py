@@ -5,20 +5,30 @@ Created on 20.07.2015
 '''
 import unittest
 import pickle
+import cPickle
 import picklesize
 import copy_reg
+import marshal
+import pickletools
+import json
+import os
+import sys
+import contextlib
 
 
 class TestEstimator(unittest.TestCase):
+
+    module = pickle
+    protocol = pickle.HIGHEST_PROTOCOL
     
     def setUp(self):
         self.target = picklesize.PickleSize()
 
     def compare(self, obj):
-        data = pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL)
+        data = self.module.dumps(obj, self.protocol)
         expected = len(data)
         
-        actual = self.target.picklesize(obj, pickle.HIGHEST_PROTOCOL)
+        actual = self.target.picklesize(obj, self.protocol)
         
         self.assertEqual(expected, actual, "Wrong estimate (%s instead of %s) for %r." % 
                          (actual, expected, obj))
@@ -50,6 +60,11 @@ class TestEstimator(unittest.TestCase):
         self.compare(-0xFFFF-1)
         self.compare(-0xFFFF)
         self.compare(-0xFFFF+1)
+
+        self.compare(2**31-1)
+        self.compare(-2**31)
+        self.compare(2**31)
+        self.compare(-2**31-1)
         
     def test_long(self):
         self.compare(0L)
@@ -104,6 +119,46 @@ class TestEstimator(unittest.TestCase):
         self.compare(global_function)
         self.compare(max)
         
+    def test_datetime(self):
+        import datetime
+        self.compare(datetime.datetime(2020, 1, 2, 3, 4, 5, 6))
+        self.compare(datetime.datetime(2020, 1, 2, tzinfo=UTC()))
+        self.compare(datetime.date(2020, 1, 2))
+        self.compare(datetime.time(1, 2, 3, 4))
+        self.compare(datetime.time(1, 2, tzinfo=UTC()))
+        self.compare(datetime.timedelta(1, 2, 3))
+        self.compare(datetime.timedelta(-1000, 0, 999999))
+        self.compare([datetime.date(2020, 1, 2)] * 3)
+
+    def test_decimal(self):
+        import decimal
+        for s in ["0", "5", "123", "-3", "1.5", "-0.001", "1E+3", "1e-7",
+                  "0.000001", "123.456e10", "NaN", "-Infinity", "sNaN12"]:
+            self.compare(decimal.Decimal(s))
+        self.compare([decimal.Decimal("1.5")] * 2)
+
+    def test_array(self):
+        import array
+        for typecode in "bBhHiIlLfd":
+            self.compare(array.array(typecode))
+            self.compare(array.array(typecode, range(100)))
+            if typecode not in "bB":
+                self.compare(array.array(typecode, range(2000)))
+        self.compare(array.array("b", range(-100, 100)))
+        self.compare(array.array("i", [-2**31, 2**31-1]))
+        self.compare(array.array("l", [2**62, -2**62]))
+        self.compare(array.array("L", [2**63]))
+        self.compare(array.array("c", "hello world"))
+        self.compare(array.array("u", u"hello \u20ac\u20ac"))
+        self.compare(array.array("u", u"".join(unichr(0x4e00 + i) for i in range(300))))
+        self.compare(MyArray("d", [1.0]))
+
+    def test_uuid(self):
+        import uuid
+        self.compare(uuid.UUID(int=0))
+        self.compare(uuid.UUID(int=2**128-1))
+        self.compare([uuid.UUID(int=1), uuid.UUID(int=1)])
+
     def test_Ref(self):
         x = "abc"
         self.compare([x,x])
@@ -128,9 +183,285 @@ class TestEstimator(unittest.TestCase):
     def test_numpy_large(self):
         import numpy as np
         self.compare(np.ones(1024*1024))
+
+    def test_numpy_order(self):
+        import numpy as np
+        # Larger than a part of the data string of protocol 0.
+        x = np.arange(200000, dtype='u1').reshape(400, 500)
+        self.compare(x)
+        self.compare(np.asfortranarray(x))
+        self.compare(x[::3, 1::2])
+        quotes = np.zeros(200000, dtype='u1')
+        quotes[0] = ord("'")
+        self.compare(quotes)
+        quotes[-1] = ord('"')
+        self.compare(quotes)
+
+    def test_numpy_small(self):
+        import numpy as np
+        self.compare([np.ones(1, dtype='u1'), np.ones(1, dtype='u1'), np.ones(0)])
+
+    def test_numpy_object(self):
+        import numpy as np
+        x = "shared"
+        self.compare(np.array([1, x, None, x], dtype=object))
+        self.compare(np.array([[x, 1], [2, x]], dtype=object, order='F'))
+        self.compare([x, np.array(10*[x], dtype=object)])
+
+    def test_numpy_structured(self):
+        import numpy as np
+        self.compare(np.zeros(10, dtype=[('a', 'i4'), ('b', 'f8', (2,))]))
+        self.compare(np.zeros(3, dtype=[('a', 'i4'), ('b', 'O')]))
+        self.compare(np.rec.array([(1, 2.0), (3, 4.0)], dtype='i4,f8'))
+
+    def test_numpy_scalar(self):
+        import numpy as np
+        self.compare(np.float64(1.5))
+        self.compare(np.int32(3))
+        self.compare([np.bool_(True), np.bool_(True), np.uint8(7), np.uint8(7)])
+        self.compare([np.string_("abc"), np.unicode_(u"ab")])
+        self.compare([np.unicode_(u""), np.string_(""), np.string_("a")])
+        self.compare(np.zeros(1, dtype='i4,f8')[0])
+        self.compare(np.datetime64('2020-01-01'))
+
+    def test_numpy_masked(self):
+        import numpy as np
+        self.compare(np.ma.masked_array([1.0, 2.0, 3.0], mask=[0, 1, 0]))
+        self.compare(np.ma.masked_array([1.0, 2.0, 3.0]))
+        self.compare(np.ma.masked_array([1.0], mask=[1], fill_value=42.0))
+        self.compare([np.ma.masked_array(np.ones((4, 4)).T), np.ma.masked_array([1, 2])])
+        self.compare(np.ma.masked_array(np.zeros(2, dtype='i4,f8')))
+        self.compare(np.ma.masked_array([1, "x"], dtype=object, mask=[0, 1]))
+        self.compare(np.ma.masked_array(np.zeros(2, dtype=[('a', 'i4'), ('b', 'O')]),
+                                        mask=[(0, 1), (1, 0)]))
+
+    def test_numpy_memmap(self):
+        import numpy as np
+        import tempfile
+        with tempfile.NamedTemporaryFile() as f:
+            m = np.memmap(f.name, dtype='f8', mode='w+', shape=(100,))
+            self.compare(m)
+            self.compare(np.matrix([[1, 2], [3, 4]]))
         
     
 
+class TestHybrid(TestEstimator):
+
+    def setUp(self):
+        self.target = picklesize.PickleSize(hybrid=True)
+
+    def test_iterator_reducer(self):
+        x = "shared"
+        y = "also shared"
+        self.compare(IteratorReducer([1, 2, 3], {"a":1}))
+        self.compare([x, IteratorReducer([x, y], {y:x}), y, x])
+
+    def test_fallback_types(self):
+        self.target = picklesize.PickleSize(fallback_types=[NewStyle_WithAttribs])
+        x = "shared"
+        obj = NewStyle_WithAttribs()
+        obj.a = x
+        self.compare([x, obj, obj, x])
+
+    def test_estimated_parts(self):
+        # Placeholders within are sized by the estimator, not pickled.
+        size = self.target.picklesize(IteratorReducer([None], {}), 2)
+        obj = IteratorReducer([picklesize.PlaceHolder(1000)], {})
+        self.assertEqual(size - 1 + 1000, self.target.picklesize(obj, 2))
+
+        self.target = picklesize.PickleSize(fallback_types=[NewStyle_WithAttribs])
+        obj = NewStyle_WithAttribs()
+        obj.a = None
+        size = self.target.picklesize(obj, 2)
+        obj.a = Lazy_Sized(1000)
+        self.assertEqual(size - 1 + 1000 + 2, self.target.picklesize(obj, 2))
+        self.assertEqual([2], obj.a.calls)
+
+    def test_reduce_once(self):
+        for target in ("pickle", "cPickle"):
+            obj = IteratorReducer([1], {})
+            picklesize.picklesize(obj, 2, hybrid=True, target=target)
+            self.assertEqual(1, obj.reduces)
+
+
+class TestDedup(TestEstimator):
+
+    def setUp(self):
+        self.target = picklesize.DedupAnalysis()
+
+    def test_strings(self):
+        a = "".join(["ab", "c"])
+        b = "".join(["a", "bc"])
+        report = picklesize.dedupanalysis({"x":[a, b, a], "y":b}, pickle.HIGHEST_PROTOCOL)
+        self.assertEqual(1, len(report.values))
+        value = report.values[0]
+        self.assertEqual("abc", value.value)
+        self.assertEqual(2, value.copies)
+
+        # Each copy could be a two byte GET instead.
+        expected = len(pickle.dumps(b, pickle.HIGHEST_PROTOCOL)) - 3 - 2
+        self.assertEqual(expected, value.saving)
+        self.assertEqual(expected, report.saving)
+        self.assertEqual([("obj['x'][*]", expected)], report.locations)
+
+    def test_saving(self):
+        obj = [str(i % 3) + "x" for i in range(100)]
+        report = picklesize.dedupanalysis(obj, pickle.HIGHEST_PROTOCOL)
+        interned = [intern(s) for s in obj]
+        self.assertEqual(len(pickle.dumps(obj, pickle.HIGHEST_PROTOCOL)), report.size)
+        self.assertEqual(report.size - len(pickle.dumps(interned, pickle.HIGHEST_PROTOCOL)),
+                         report.saving)
+
+    def test_tuples(self):
+        report = picklesize.dedupanalysis([(1, 2.0), (1, 2.0), (1.0, 2.0), ("a",), ("a",)],
+                                          pickle.HIGHEST_PROTOCOL)
+        self.assertEqual([((1, 2.0), 2)], [(v.value, v.copies) for v in report.values])
+
+    def test_attributes(self):
+        obj = [NewStyle_WithAttribs(), NewStyle_WithAttribs()]
+        obj[0].a = "".join(["x", "y"])
+        obj[1].a = "".join(["x", "y"])
+        report = picklesize.dedupanalysis(obj, pickle.HIGHEST_PROTOCOL)
+        self.assertEqual(["NewStyle_WithAttribs['a']"], [l for l, s in report.locations])
+
+    def test_numpy_dedup(self):
+        import numpy as np
+        report = picklesize.dedupanalysis([np.arange(3), np.arange(3), np.arange(1000)],
+                                          pickle.HIGHEST_PROTOCOL, array_threshold=100)
+        arrays = [v for v in report.values if isinstance(v.value, np.ndarray)]
+        self.assertEqual(1, len(arrays))
+        self.assertEqual(2, arrays[0].copies)
+
+
+class TestProtocol0(TestEstimator):
+
+    protocol = 0
+
+    def test_strings(self):
+        self.compare("It's")
+        self.compare('say "hi"')
+        self.compare("""both ' and " """)
+        self.compare("tab\there\nnew line\\")
+        self.compare("".join(chr(i) for i in range(256)))
+
+    def test_unicode_escapes(self):
+        self.compare(u"back\\slash\nnew line\r")
+        self.compare(u"\xe4\u20ac\U0001f600\x00")
+
+    def test_floats(self):
+        self.compare([0.1, 1e100, -2.5, 1e-7, float("inf")])
+
+    def test_keep_alive(self):
+        # The memo entry pickle uses to keep `__getinitargs__` results
+        # alive shifts the memo indices.
+        self.compare([OldStyle_WithInitArgs(i, "".join(["x", str(i)])) for i in range(300)])
+
+
+class TestProtocol1(TestEstimator):
+
+    protocol = 1
+
+
+class TestCPickle(TestEstimator):
+
+    module = cPickle
+
+    def setUp(self):
+        self.target = picklesize.PickleSize(target="cPickle")
+
+    def test_single_references(self):
+        # cPickle doesn't memorize what only the tuple refers to.
+        self.compare(tuple([str(i) + "x" for i in range(300)]))
+        self.compare({"".join(["a", "b"]):"".join(["c", "d"])})
+        self.compare([str(i) + "x" for i in range(300)])
+
+    def test_short_strings(self):
+        x = "".join(["a"])
+        self.compare([x, x, "", "", u"b", u"b"])
+
+    def test_keep_alive(self):
+        self.compare([OldStyle_WithInitArgs(i, "".join(["x", str(i)])) for i in range(300)])
+
+    def test_hybrid(self):
+        self.target = picklesize.PickleSize(hybrid=True, target="cPickle")
+        x = "shared"
+        y = "also shared"
+        self.compare([x, IteratorReducer([x, y], {y:x}), y, x])
+
+    def test_repeated_calls(self):
+        # The estimator must not hold on to the objects of a previous call.
+        obj = NewStyle_WithAttribs()
+        obj.s = "".join(["q", "r"])
+        self.target.picklesize(obj, 0)
+        self.compare(obj)
+        picklesize.sizedchunks([obj], 100, self.protocol, self.target)
+        self.compare(obj)
+
+    def test_module_function(self):
+        obj = [(1, 2)] * 3
+        self.assertEqual(len(cPickle.dumps(obj, 2)),
+                         picklesize.picklesize(obj, 2, target="cPickle"))
+
+
+class TestCPickleProtocol0(TestCPickle):
+
+    protocol = 0
+
+
+class TestCPickleProtocol1(TestCPickle):
+
+    protocol = 1
+
+
+class TestDedupCPickle(TestCPickle):
+
+    def setUp(self):
+        self.target = picklesize.DedupAnalysis(target="cPickle")
+
+
+class TestReferenceOverhead(unittest.TestCase):
+    """
+    The references the estimator holds itself are measured, so subclasses
+    that wrap `_traverse` get exact sizes for `cPickle` too.
+    """
+
+    def objects(self):
+        shared = "sha" + "red"
+        yield ["sin" + "gle"]
+        yield [shared, shared, ("tu" + "ple", ["li" + "st"])]
+        yield {"ke" + "y": ["val" + "ue"], shared: OldStyle_WithAttribs()}
+
+    def assertExact(self, cls):
+        estimator = cls(target="cPickle")
+        for protocol in range(3):
+            for obj in self.objects():
+                expected = len(cPickle.dumps(obj, protocol))
+                actual = estimator.picklesize(obj, protocol)
+                self.assertEqual(expected, actual, "%s: wrong estimate (%s instead of %s) for %r." %
+                                 (cls.__name__, actual, expected, obj))
+
+    def test_subclasses(self):
+        classes = [picklesize.PickleSize]
+        for cls in classes:
+            classes.extend(cls.__subclasses__())
+        for cls in classes:
+            if cls.__module__.startswith("picklesize._"):
+                self.assertExact(cls)
+
+    def test_wrapped_traverse(self):
+        class WrappedTraverse(picklesize.PickleSize):
+            def _traverse(self, obj):
+                held = [obj]
+                return picklesize.PickleSize._traverse(self, held[0])
+        self.assertExact(WrappedTraverse)
+
+    def test_top_level(self):
+        # Assumed to be held by a variable of the caller, like `x`.
+        x = "".join(["a", "b"])
+        self.assertEqual(len(cPickle.dumps(x, 2)),
+                         picklesize.picklesize(x, 2, target="cPickle"))
+
+
 class TestFast(TestEstimator):
     
     def setUp(self):
@@ -151,6 +482,400 @@ class TestFast(TestEstimator):
 
     
 
+class TestMarshal(unittest.TestCase):
+
+    def compare(self, obj, version=marshal.version):
+        expected = len(marshal.dumps(obj, version))
+        actual = picklesize.marshalsize(obj, version)
+        self.assertEqual(expected, actual, "Wrong estimate (%s instead of %s) for %r." % 
+                         (actual, expected, obj))
+
+    def test_constants(self):
+        self.compare(None)
+        self.compare(True)
+        self.compare(False)
+        self.compare(Ellipsis)
+        self.compare(StopIteration)
+
+    def test_int(self):
+        self.compare(0)
+        self.compare(-1)
+        self.compare(2**31-1)
+        self.compare(2**31)
+        self.compare(-2**31)
+        self.compare(-2**31-1)
+
+    def test_long(self):
+        self.compare(0L)
+        self.compare(-1L)
+        self.compare(2L**15)
+        self.compare(10L**1000)
+
+    def test_float(self):
+        for version in range(3):
+            self.compare(0.0, version)
+            self.compare(-42.42, version)
+            self.compare(1e300, version)
+            self.compare(3+4.5j, version)
+
+    def test_string(self):
+        for version in range(3):
+            self.compare("", version)
+            self.compare(1000*"x", version)
+            self.compare(["abc", "abc", intern("not an identifier!")], version)
+
+    def test_large_string(self):
+        import resource
+        import sys
+        # `ru_maxrss` is in bytes on OS X, KiB elsewhere.
+        unit = 1 if sys.platform == "darwin" else 1024
+        s = 64*1024*1024*"x" + "y"
+        before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        self.assertEqual(5 + len(s), picklesize.marshalsize(s))
+        after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        self.assertLess((after - before) * unit, len(s) // 2)
+
+    def test_unicode(self):
+        self.compare(u"")
+        self.compare(u"\u20ac" * 10)
+
+    def test_containers(self):
+        self.compare((1, 2, "x"))
+        self.compare([1, [2, [3]]])
+        self.compare({1:2, "a":(3, 4)})
+        self.compare(set([1, 2, 3]))
+        self.compare(frozenset(["a"]))
+
+    def test_buffer(self):
+        self.compare(bytearray("abc"))
+        self.compare(buffer("abcdef", 2))
+
+    def test_code(self):
+        self.compare(global_function.func_code)
+        self.compare(TestMarshal.compare.im_func.func_code)
+
+    def test_unmarshallable(self):
+        self.assertRaises(ValueError, picklesize.marshalsize, object())
+
+    def test_nesting(self):
+        with deep_recursion():
+            self.compare(nested(1999, 1))
+            self.compare(nested(1999, []))
+            self.compare(nested(1998, {1:2}))
+            self.assertRaises(ValueError, marshal.dumps, nested(2000, 1))
+            self.assertRaises(ValueError, picklesize.marshalsize, nested(2000, 1))
+            self.assertRaises(ValueError, picklesize.marshalsize, nested(2500, []))
+
+    def test_recursive(self):
+        x = []
+        x.append(x)
+        self.assertRaises(ValueError, picklesize.marshalsize, x)
+
+
+class TestJson(unittest.TestCase):
+
+    def compare(self, obj):
+        expected = len(json.dumps(obj))
+        actual = picklesize.jsonsize(obj)
+        self.assertEqual(expected, actual, "Wrong estimate (%s instead of %s) for %r." % 
+                         (actual, expected, obj))
+
+    def test_constants(self):
+        self.compare(None)
+        self.compare(True)
+        self.compare(False)
+
+    def test_numbers(self):
+        self.compare(0)
+        self.compare(-123)
+        self.compare(10L**100)
+        self.compare(0.1)
+        self.compare(-1e300)
+        self.compare(float("nan"))
+        self.compare(float("inf"))
+        self.compare(float("-inf"))
+
+    def test_string(self):
+        self.compare("")
+        self.compare("abc")
+        self.compare('quote " backslash \\ newline \n bell \a del \x7f')
+        self.compare("utf-8 \xe2\x82\xac")
+
+    def test_unicode(self):
+        self.compare(u"")
+        self.compare(u"\u20ac \t \x00")
+        self.compare(u"\U0001f600")
+
+    def test_containers(self):
+        self.compare([])
+        self.compare(())
+        self.compare({})
+        self.compare([1, (2, 3), [4]])
+        self.compare({"a":1, u"b":[2, 3], 4:5, 1.5:None, None:True, True:False})
+
+    def test_shared(self):
+        x = ["abc"]
+        self.compare([x, x])
+
+    def test_subclass(self):
+        self.compare(MyInt(42))
+        self.compare(MyStr("abc"))
+
+    def test_circular(self):
+        x = []
+        x.append(x)
+        self.assertRaises(ValueError, picklesize.jsonsize, x)
+
+    def test_unsupported(self):
+        self.assertRaises(TypeError, picklesize.jsonsize, object())
+        self.assertRaises(TypeError, picklesize.jsonsize, {(1, 2):3})
+
+
+class TestMsgpack(unittest.TestCase):
+
+    def setUp(self):
+        try:
+            import msgpack
+        except ImportError:
+            self.skipTest("msgpack is not installed")
+        self.msgpack = msgpack
+
+    def compare(self, obj, use_bin_type=False):
+        expected = len(self.msgpack.packb(obj, use_bin_type=use_bin_type))
+        actual = picklesize.msgpacksize(obj, use_bin_type)
+        self.assertEqual(expected, actual, "Wrong estimate (%s instead of %s) for %r." % 
+                         (actual, expected, obj))
+
+    def test_constants(self):
+        self.compare(None)
+        self.compare(True)
+        self.compare(False)
+        self.compare(1.5)
+
+    def test_int(self):
+        for value in [0, 0x7F, 0x80, 0xFF, 0x100, 0xFFFF, 0x10000,
+                      0xFFFFFFFF, 0x100000000, 0xFFFFFFFFFFFFFFFF,
+                      -0x20, -0x21, -0x80, -0x81, -0x8000, -0x8001,
+                      -0x80000000, -0x80000001, -0x8000000000000000]:
+            self.compare(value)
+
+    def test_string(self):
+        for use_bin_type in [False, True]:
+            for n in [0, 0x1F, 0x20, 0xFF, 0x100, 0x10000]:
+                self.compare(n*"x", use_bin_type)
+                self.compare(n*u"\u20ac", use_bin_type)
+
+    def test_containers(self):
+        self.compare([])
+        self.compare(15*[1])
+        self.compare(16*[1])
+        self.compare(0x10000*[1])
+        self.compare((1, 2))
+        self.compare(dict((i, i) for i in range(20)))
+
+    def test_nesting(self):
+        with deep_recursion():
+            self.compare(nested(511, 1))
+            self.compare(nested(511, []))
+            self.compare(nested(510, {1:2}))
+            self.assertRaises(ValueError, self.msgpack.packb, nested(512, 1))
+            self.assertRaises(ValueError, picklesize.msgpacksize, nested(512, 1))
+            self.assertRaises(ValueError, picklesize.msgpacksize, nested(600, []))
+
+    def test_recursive(self):
+        x = []
+        x.append(x)
+        self.assertRaises(ValueError, picklesize.msgpacksize, x)
+
+
+class TestFormatSizes(unittest.TestCase):
+
+    def test_all(self):
+        obj = {"a":[1, 2.5, u"x"]}
+        sizes = picklesize.formatsizes(obj)
+        self.assertEqual(len(pickle.dumps(obj, pickle.HIGHEST_PROTOCOL)), sizes["pickle"])
+        self.assertEqual(len(marshal.dumps(obj)), sizes["marshal"])
+        self.assertEqual(len(json.dumps(obj)), sizes["json"])
+        self.assertIn("msgpack", sizes)
+
+    def test_unsupported(self):
+        sizes = picklesize.formatsizes(NewStyle_WithAttribs(), ["pickle", "json"])
+        self.assertEqual(["json", "pickle"], sorted(sizes))
+        self.assertIsNone(sizes["json"])
+
+    def test_recursive(self):
+        x = []
+        x.append(x)
+        sizes = picklesize.formatsizes(x)
+        self.assertEqual(len(pickle.dumps(x, pickle.HIGHEST_PROTOCOL)), sizes["pickle"])
+        self.assertEqual({"marshal":None, "json":None, "msgpack":None},
+                         dict((k, v) for k, v in sizes.items() if k != "pickle"))
+
+
+class TestCost(TestEstimator):
+
+    def setUp(self):
+        self.target = picklesize.PickleCost()
+
+    def compare(self, obj):
+        TestEstimator.compare(self, obj)
+        for protocol in range(3):
+            for target, module in (("pickle", pickle), ("cPickle", cPickle)):
+                counts = picklesize.PickleCost(target=target).picklecost(obj, protocol)
+                opcodes = [op.name for op, _, _ in pickletools.genops(module.dumps(obj, protocol))]
+                puts = len([name for name in opcodes if name.endswith("PUT")])
+                gets = len([name for name in opcodes if name.endswith("GET")])
+                self.assertEqual((len(opcodes) - puts - gets, puts, gets),
+                                 (counts.opcodes, counts.memo_puts, counts.memo_gets),
+                                 "Wrong counts for %r with %s protocol %s." % (obj, target, protocol))
+
+    def test_counts(self):
+        x = "abc"
+        counts = picklesize.picklecost([x, x, 1], pickle.HIGHEST_PROTOCOL)
+        self.assertEqual(len(pickle.dumps([x, x, 1], pickle.HIGHEST_PROTOCOL)), counts.size)
+        # PROTO, EMPTY_LIST, MARK, SHORT_BINSTRING, BININT1, APPENDS and STOP
+        self.assertEqual(7, counts.opcodes)
+        self.assertEqual(2, counts.memo_puts)
+        self.assertEqual(1, counts.memo_gets)
+        self.assertEqual(0, counts.reduces)
+        # Only the characters of the string
+        self.assertEqual(3, counts.bulk_bytes)
+
+    def test_bulk_bytes(self):
+        obj = [300*"x", u"\u20ac\u20ac", picklesize.PlaceHolder(7)]
+        self.assertEqual(300 + 6 + 7, picklesize.picklecost(obj, 2).bulk_bytes)
+        # The repr of the string and the escaped unicode
+        self.assertEqual(4 + 12, picklesize.picklecost(["ab", u"\u20ac\u20ac"], 0).bulk_bytes)
+
+    def test_reduces(self):
+        counts = picklesize.picklecost([NewStyle_WithAttribs()], pickle.HIGHEST_PROTOCOL)
+        self.assertEqual(1, counts.reduces)
+
+    def test_predict(self):
+        model = picklesize.CostModel((1, 0, 0, 0, 0, 2), (0, 1, 0, 0, 0, 0))
+        size, dumps, loads = model.predict(10*"x")
+        self.assertEqual(len(pickle.dumps(10*"x", pickle.HIGHEST_PROTOCOL)), size)
+        self.assertEqual(1 + 2*10, dumps)
+        # PROTO, SHORT_BINSTRING and STOP
+        self.assertEqual(3, loads)
+
+    def test_calibrate(self):
+        model = picklesize.calibrate(repeat=1)
+        size, dumps, loads = model.predict(range(1000))
+        self.assertGreaterEqual(dumps, 0)
+        self.assertGreaterEqual(loads, 0)
+        self.assertEqual("cPickle", picklesize.calibrate(cPickle, repeat=1).target)
+
+
+class TestLazySize(unittest.TestCase):
+
+    def test_placeholder(self):
+        x = picklesize.PlaceHolder(100)
+        self.assertEqual(3 + 100, picklesize.picklesize(x, pickle.HIGHEST_PROTOCOL))
+
+    def test_placeholder_callable(self):
+        calls = []
+        def provider():
+            calls.append(None)
+            return 100
+        x = picklesize.PlaceHolder(provider)
+        self.assertEqual([], calls)
+        self.assertEqual(picklesize.picklesize([picklesize.PlaceHolder(100)]*2, 2),
+                         picklesize.picklesize([x, x], 2))
+        self.assertEqual(1, len(calls))
+        picklesize.picklesize(x, 2)
+        self.assertEqual(2, len(calls))
+
+    def test_placeholder_stat(self):
+        x = picklesize.PlaceHolder(lambda:os.stat(__file__).st_size)
+        self.assertEqual(3 + os.path.getsize(__file__), picklesize.picklesize(x, 2))
+
+    def test_picklesize_method(self):
+        s = 95*"x"
+        x = Lazy_Sized(2 + len(s))
+        for protocol in (1, 2):
+            for target in ("pickle", "cPickle"):
+                expected = picklesize.picklesize([s, s, s], protocol, target=target)
+                actual = picklesize.picklesize([x, x, x], protocol, target=target)
+                self.assertEqual(expected, actual)
+        self.assertEqual([1, 1, 2, 2], x.calls)
+
+    def test_picklesize_method_oldstyle(self):
+        s = 95*"x"
+        x = OldStyle_Sized()
+        self.assertEqual(picklesize.picklesize([s, s], 2),
+                         picklesize.picklesize([x, x], 2))
+
+    def test_bounds(self):
+        x = picklesize.PlaceHolder(lambda:picklesize.SizeBounds(10, 100))
+        y = Lazy_Sized(picklesize.SizeBounds(5, 7))
+        obj = [x, x, y]
+        high = picklesize.picklesize(obj, 2)
+        self.assertEqual((high - 2*90 - 2, high), picklesize.picklesizebounds(obj, 2))
+
+    def test_exact_bounds(self):
+        size = picklesize.picklesize(range(10), 2)
+        self.assertEqual((size, size), picklesize.picklesizebounds(range(10), 2))
+
+    def test_fast(self):
+        x = picklesize.PlaceHolder(lambda:picklesize.SizeBounds(10, 100))
+        y = Lazy_Sized(50)
+        low, high = picklesize.FastPickleSize().picklesizebounds([x, y, y], 2)
+        self.assertEqual(90, high - low)
+        self.assertEqual([2], y.calls)
+        self.assertGreaterEqual(high, 150)
+
+
+class TestChunking(unittest.TestCase):
+
+    def test_sizedchunks(self):
+        # 3 + 2 + 95 bytes each
+        items = [str(i) + 94*"x" for i in range(10)]
+        chunks = list(picklesize.sizedchunks(iter(items), 300))
+        self.assertEqual([items[0:3], items[3:6], items[6:9], items[9:]], chunks)
+
+    def test_large_item(self):
+        items = ["a", 1000*"x", "b", "c"]
+        chunks = list(picklesize.sizedchunks(items, 100))
+        self.assertEqual([["a"], [1000*"x"], ["b", "c"]], chunks)
+
+    def test_max_items(self):
+        chunks = list(picklesize.sizedchunks(range(5), 1000, max_items=2))
+        self.assertEqual([[0, 1], [2, 3], [4]], chunks)
+
+    def test_empty(self):
+        self.assertEqual([], list(picklesize.sizedchunks([], 100)))
+
+    def test_estimator(self):
+        items = [range(100), range(100)]
+        size = len(pickle.dumps(items[0], 1))
+        estimator = picklesize.PickleSize()
+        chunks = picklesize.sizedchunks(items, size, 1, estimator)
+        self.assertEqual([[items[0]], [items[1]]], list(chunks))
+
+    def test_chunkedmap(self):
+        items = [i*"x" for i in range(100)]
+        results = picklesize.chunkedmap(map, len, items, 500)
+        self.assertEqual(range(100), list(results))
+
+    def test_pool(self):
+        import multiprocessing
+        pool = multiprocessing.Pool(2)
+        try:
+            items = [i*"x" for i in range(100)]
+            results = picklesize.chunkedmap(pool.imap, len, items, 500)
+            self.assertEqual(range(100), list(results))
+        finally:
+            pool.terminate()
+            pool.join()
+
+    def test_benchmark(self):
+        results = picklesize.benchmarkchunks(n=100, chunksizes=(1, 10),
+                                             processes=2, repeat=1)
+        self.assertEqual(["chunksize=1", "chunksize=10", "chunk_bytes=262144"],
+                         [name for name, _, _ in results])
+
+
 class OldStyle_WithAttribs():
     def __init__(self):
         self.a = 12
@@ -159,10 +884,40 @@ class OldStyle_WithAttribs():
 class OldStyle_WithInit():
     def __getinitargs__(self):
         return (1,2,3)
+
+class OldStyle_WithInitArgs():
+    def __init__(self, a, b):
+        self.a = a
+        self.b = b
+    def __getinitargs__(self):
+        return (self.a, self.b)
+    def __getstate__(self):
+        return {"b":self.b}
     
+class OldStyle_Sized():
+    def __picklesize__(self, protocol):
+        return 2 + 95
+
+class Lazy_Sized(object):
+    def __init__(self, size):
+        self.size = size
+        self.calls = []
+    def __picklesize__(self, protocol):
+        self.calls.append(protocol)
+        return self.size
+
 class NewStyle_Reducer(object):
     pass
 
+class IteratorReducer(object):
+    def __init__(self, items, dictitems):
+        self.items = items
+        self.dictitems = dictitems
+        self.reduces = 0
+    def __reduce__(self):
+        self.reduces += 1
+        return (IteratorReducer, ([], {}), None, iter(self.items), self.dictitems.iteritems())
+
 class NewStyle_WithAttribs(object):
     def __init__(self):
         self.a = 12
@@ -174,4 +929,36 @@ def tuple_reducer(obj):
 copy_reg.pickle(NewStyle_Reducer, tuple_reducer)
 
 def global_function():
-    pass
\ No newline at end of file
+    pass
+
+def nested(depth, leaf):
+    # `leaf` inside of `depth` lists.
+    for _ in range(depth):
+        leaf = [leaf]
+    return leaf
+
+@contextlib.contextmanager
+def deep_recursion():
+    # The estimators need a few frames per level.
+    limit = sys.getrecursionlimit()
+    sys.setrecursionlimit(10000)
+    try:
+        yield
+    finally:
+        sys.setrecursionlimit(limit)
+
+class MyInt(int):
+    pass
+
+class MyStr(str):
+    pass
+
+import datetime
+import array
+
+class UTC(datetime.tzinfo):
+    def utcoffset(self, dt):
+        return datetime.timedelta(0)
+
+class MyArray(array.array):
+    pass